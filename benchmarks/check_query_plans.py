@@ -0,0 +1,346 @@
+"""
+Checks that the `db` helpers on hot paths use their indexes, by seeding
+a database with a synthetic roster and inspecting the query plan of
+every statement each helper runs.
+
+Meant to be run against an empty scratch Postgres database (SQLite also
+works for a quick local check). All the tables are created and then
+dropped again at the end.
+
+The tables are analyzed after seeding, so Postgres plans with the real
+row counts. On small tables, a sequential scan is cheaper than an index
+scan and is what the planner picks, so the seeded sizes have minimums.
+The defaults are several times the size of a real tournament, to check
+that the queries keep using the indexes as the tables grow.
+
+Usage:
+    python benchmarks/check_query_plans.py --database-uri URI [--athletes ATHLETES]
+        [--subscriptions SUBSCRIPTIONS] [--emails-sent EMAILS_SENT]
+
+For example, with Postgres:
+    python benchmarks/check_query_plans.py \\
+        --database-uri postgresql+psycopg2://postgres@localhost/scratch
+"""
+
+# =============================================================================
+
+import argparse
+import random
+import re
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import sqlalchemy
+from flask import Flask
+
+sys.path.insert(0, str((Path(__file__).parent / ".." / "src").resolve()))
+
+# pylint: disable=wrong-import-position
+import db  # noqa: E402
+from db._utils import bulk_insert  # noqa: E402
+from db.models import EmailRecipient, EmailSent, UserSubscription  # noqa: E402
+from db.models import db as sql_db  # noqa: E402
+
+sys.path.insert(0, str(Path(__file__).parent.resolve()))
+
+from set_roster import make_roster  # noqa: E402
+
+# =============================================================================
+
+NUM_MATCHES = 2000
+
+# The smallest seeded sizes for which Postgres is expected to use the
+# indexes at all
+MIN_ATHLETES = 10000
+MIN_SUBSCRIPTIONS = 2500
+MIN_EMAILS_SENT = 5000
+
+# =============================================================================
+
+
+class StatementRecorder:
+    """Records the SELECT statements executed on an engine."""
+
+    def __init__(self, engine):
+        self.statements = []
+        self.recording = False
+        sqlalchemy.event.listen(
+            engine, "before_cursor_execute", self._before_cursor_execute
+        )
+
+    def _before_cursor_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):  # pylint: disable=unused-argument,too-many-arguments
+        if not self.recording or executemany:
+            return
+        if statement.lstrip().upper().startswith("SELECT"):
+            self.statements.append((statement, parameters))
+
+    def record(self, func, *args, **kwargs):
+        """Calls the given function and returns the statements it ran."""
+        self.statements = []
+        self.recording = True
+        try:
+            func(*args, **kwargs)
+        finally:
+            self.recording = False
+        return self.statements
+
+
+def get_used_indexes(connection, statement, parameters):
+    """Returns the names of the indexes in the plan of the statement."""
+    if connection.dialect.name == "postgresql":
+        (plan,) = connection.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {statement}", parameters
+        ).one()
+        indexes = set()
+        nodes = [plan[0]["Plan"]]
+        while len(nodes) > 0:
+            node = nodes.pop()
+            if "Index Name" in node:
+                indexes.add(node["Index Name"])
+            nodes.extend(node.get("Plans", []))
+        return indexes
+    if connection.dialect.name == "sqlite":
+        rows = connection.exec_driver_sql(
+            f"EXPLAIN QUERY PLAN {statement}", parameters
+        )
+        return {
+            match.group(1)
+            for row in rows
+            for match in re.finditer(
+                r"USING (?:COVERING )?INDEX (\S+)", row[-1]
+            )
+        }
+    raise ValueError(f"Unsupported database: {connection.dialect.name}")
+
+
+# =============================================================================
+
+
+def seed(roster, num_subscriptions, num_emails_sent, seed_value=0):
+    error_msg, _ = db.roster.set_roster(roster)
+    if error_msg is not None:
+        raise RuntimeError(error_msg)
+    rand = random.Random(seed_value)
+    emails = [user["email"] for user in roster["users"]]
+    teams = roster["teams"]
+    subscriptions = set()
+    while len(subscriptions) < num_subscriptions:
+        team = rand.choice(teams)
+        subscriptions.add(
+            (
+                rand.choice(emails),
+                team["school"],
+                team["division"],
+                team["number"],
+            )
+        )
+    bulk_insert(
+        UserSubscription,
+        [
+            {
+                "email": email,
+                "school": school,
+                "division": division,
+                "number": number,
+            }
+            for email, school, division, number in sorted(subscriptions)
+        ],
+    )
+    time_sent = datetime(2023, 3, 4)
+    bulk_insert(
+        EmailSent,
+        [
+            {
+                "id": i + 1,
+                "match_number": rand.randint(1, NUM_MATCHES),
+                "template_name": "Template",
+                "subject": "Subject",
+                "time_sent": time_sent + timedelta(seconds=i),
+            }
+            for i in range(num_emails_sent)
+        ],
+    )
+    bulk_insert(
+        EmailRecipient,
+        [
+            {"email_sent_id": i + 1, "email": email}
+            for i in range(num_emails_sent)
+            for email in rand.sample(emails, 4)
+        ],
+    )
+    sql_db.session.commit()
+    with sql_db.engine.begin() as connection:
+        connection.exec_driver_sql("ANALYZE")
+
+
+def get_teams_without_snapshot(school_team_codes):
+    db.roster.GLOBAL_ROSTER_SNAPSHOT = None
+    return db.roster.get_teams(school_team_codes)
+
+
+def get_emails_for_division(division):
+    return list(db.roster.iter_emails_for_division(division))
+
+
+def get_second_sent_emails_page():
+    _, page = db.sent_emails.get_sent_emails_page()
+    return db.sent_emails.get_sent_emails_page(page["next_cursor"])
+
+
+def make_checks(roster, rand):
+    """Returns the checks to run, as tuples of the description, the
+    function and args to call, and the possible names of the index that
+    at least one of its statements should use.
+
+    SQLite doesn't use the name of a unique constraint for its index, so
+    both names are given for those.
+    """
+    school = rand.choice(roster["schools"])
+    school_team_codes = [
+        (team["school"], team["division"], team["number"])
+        for team in rand.sample(roster["teams"], 10)
+    ]
+    division = rand.choice(
+        sorted({team["division"] for team in roster["teams"]})
+    )
+    athlete = rand.choice(
+        [user for user in roster["users"] if user["role"] == "ATHLETE"]
+    )
+    return [
+        (
+            "db.roster.get_users_for_schools()",
+            (db.roster.get_users_for_schools, [school], ["COACH"]),
+            {"ix_Users_school_id_role"},
+        ),
+        (
+            "db.roster.iter_emails_for_division()",
+            (get_emails_for_division, division),
+            {"ix_Teams_division"},
+        ),
+        (
+            "db.roster.get_team_ids_for_user()",
+            (db.roster.get_team_ids_for_user, athlete["email"]),
+            {"ix_TeamMembers_user_id"},
+        ),
+        (
+            "db.roster.get_teams() (no snapshot)",
+            (get_teams_without_snapshot, school_team_codes),
+            {"_school_team_code", "sqlite_autoindex_Teams_1"},
+        ),
+        (
+            "db.subscriptions.get_all_subscribers()",
+            (db.subscriptions.get_all_subscribers, school_team_codes),
+            {"ix_UserSubscriptions_school_team_code"},
+        ),
+        (
+            "db.match_status.get_matches_status()",
+            (
+                db.match_status.get_matches_status,
+                rand.sample(range(1, NUM_MATCHES + 1), 5),
+            ),
+            {"ix_EmailsSent_match_number"},
+        ),
+        (
+            "db.sent_emails.get_emails_sent_to()",
+            (db.sent_emails.get_emails_sent_to, athlete["email"]),
+            {"ix_EmailRecipients_email"},
+        ),
+        (
+            "db.sent_emails.count_emails_sent_by_school()",
+            (db.sent_emails.count_emails_sent_by_school, [school]),
+            {"ix_EmailRecipients_email"},
+        ),
+        (
+            "db.sent_emails.get_sent_emails_page()",
+            (get_second_sent_emails_page,),
+            {"ix_EmailsSent_time_sent_id"},
+        ),
+        (
+            "db.subscriptions.get_all_subscriptions()",
+            (db.subscriptions.get_all_subscriptions, athlete["email"]),
+            {
+                "_email_school_team_code",
+                "sqlite_autoindex_UserSubscriptions_1",
+            },
+        ),
+    ]
+
+
+# =============================================================================
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--database-uri", required=True)
+    parser.add_argument("--athletes", type=int, default=20000)
+    parser.add_argument("--subscriptions", type=int, default=5000)
+    parser.add_argument("--emails-sent", type=int, default=10000)
+    args = parser.parse_args()
+    for name, value, minimum in (
+        ("--athletes", args.athletes, MIN_ATHLETES),
+        ("--subscriptions", args.subscriptions, MIN_SUBSCRIPTIONS),
+        ("--emails-sent", args.emails_sent, MIN_EMAILS_SENT),
+    ):
+        if value < minimum:
+            parser.error(
+                f"{name} must be at least {minimum}, or the planner will "
+                "prefer sequential scans anyway"
+            )
+
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = args.database_uri
+    db.init_app(app)
+
+    with app.app_context():
+        if len(sqlalchemy.inspect(sql_db.engine).get_table_names()) > 0:
+            print("Error: the database is not empty")
+            sys.exit(1)
+        recorder = StatementRecorder(sql_db.engine)
+
+        sql_db.create_all()
+        try:
+            roster = make_roster(args.athletes)
+            print(
+                f"Seeding: {len(roster['schools'])} schools, "
+                f"{len(roster['users'])} users, {len(roster['teams'])} "
+                f"teams, {args.subscriptions} subscriptions, "
+                f"{args.emails_sent} emails sent"
+            )
+            seed(roster, args.subscriptions, args.emails_sent)
+
+            num_failed = 0
+            checks = make_checks(roster, random.Random(0))
+            for description, (func, *func_args), index_names in checks:
+                statements = recorder.record(func, *func_args)
+                connection = sql_db.session.connection()
+                used_indexes = set()
+                for statement, parameters in statements:
+                    used_indexes.update(
+                        get_used_indexes(connection, statement, parameters)
+                    )
+                expected_str = " or ".join(sorted(index_names))
+                if len(index_names & used_indexes) > 0:
+                    print(f"OK    {description}: uses {expected_str}")
+                else:
+                    num_failed += 1
+                    used_str = ", ".join(sorted(used_indexes)) or "none"
+                    print(
+                        f"FAIL  {description}: does not use {expected_str} "
+                        f"(used: {used_str})"
+                    )
+                sql_db.session.rollback()
+        finally:
+            sql_db.session.rollback()
+            sql_db.drop_all()
+
+    if num_failed > 0:
+        print(f"{num_failed} of {len(checks)} checks failed")
+        sys.exit(1)
+    print(f"All {len(checks)} checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Micro-benchmark of the memoized team name parser on a synthetic matches
+worksheet.
+
+Usage:
+    python benchmarks/parse_team_names.py [--rows ROWS] [--repeat REPEAT]
+"""
+
+# =============================================================================
+
+import argparse
+import random
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str((Path(__file__).parent / ".." / "src").resolve()))
+
+# pylint: disable=wrong-import-position
+from utils import fetch_tms  # noqa: E402
+
+# =============================================================================
+
+SCHOOLS = [f"School {letter}" for letter in "ABCDEFGHIJKLMNOPQRST"]
+STATUSES = ["", "In Holding", "In Staging", "Competing", "Done"]
+
+# =============================================================================
+
+
+def make_columns(num_rows, seed=0):
+    """Makes the columns of a synthetic matches worksheet, in the format
+    returned by `fetch_tms._fetch_matches_columns()`.
+    """
+    rand = random.Random(seed)
+    rows = []
+    for i in range(num_rows):
+        division = rand.choice(fetch_tms.DIVISIONS)
+        blue, red = rand.sample(SCHOOLS, 2)
+        rows.append(
+            [
+                str(100 + i),
+                division,
+                str(rand.choice([2, 4, 8, 16, 32])),
+                rand.choice(STATUSES),
+                f"{blue} {division}{rand.randint(1, 5)}",
+                f"{red} {division}{rand.randint(1, 5)}",
+            ]
+        )
+    return [list(column) for column in zip(*rows)]
+
+
+def clear_caches():
+    fetch_tms._parse_team_code.cache_clear()
+    fetch_tms._parse_school_team_code.cache_clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    columns = make_columns(args.rows)
+
+    def build_index():
+        fetch_tms._build_matches_index(columns)
+
+    def build_index_cold():
+        clear_caches()
+        build_index()
+
+    memoized_parser = fetch_tms._parse_school_team_code
+
+    def build_index_unmemoized():
+        fetch_tms._parse_school_team_code = memoized_parser.__wrapped__
+        try:
+            build_index()
+        finally:
+            fetch_tms._parse_school_team_code = memoized_parser
+
+    clear_caches()
+    build_index()
+    print("Distinct team names:", len(set(columns[4] + columns[5])))
+
+    for label, func in (
+        ("Not memoized", build_index_unmemoized),
+        ("Cold cache", build_index_cold),
+        ("Warm cache", build_index),
+    ):
+        seconds = min(timeit.repeat(func, number=1, repeat=args.repeat))
+        print(f"{label}: {seconds * 1000:.2f} ms per {args.rows} rows")
+
+    clear_caches()
+    build_index()
+    build_index()
+    print("Cache stats:", fetch_tms.get_parse_cache_stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Benchmark of the memory used by the in-process roster snapshot for a
+synthetic roster, compared to holding ORM objects with a team class that
+keeps per-instance sets and lists.
+
+Each variant is loaded in a fresh subprocess, and the resident set size
+of the process is measured before and after loading.
+
+Usage:
+    python benchmarks/roster_memory.py [--teams TEAMS]
+"""
+
+# =============================================================================
+
+import argparse
+import gc
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import sqlalchemy.orm
+from flask import Flask
+
+sys.path.insert(0, str((Path(__file__).parent / ".." / "src").resolve()))
+
+# pylint: disable=wrong-import-position
+import db  # noqa: E402
+from db.models import School, Team, TeamMember, User  # noqa: E402
+from db.models import db as sql_db  # noqa: E402
+from utils import fetch_tms  # noqa: E402
+
+sys.path.insert(0, str(Path(__file__).parent.resolve()))
+
+from set_roster import make_roster  # noqa: E402
+
+# =============================================================================
+
+TEAM_SIZE = 5
+
+# =============================================================================
+
+
+def get_rss():
+    """Returns the resident set size of this process, in bytes."""
+    try:
+        with open("/proc/self/statm", encoding="utf-8") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # not on Linux: fall back to the peak resident set size
+        import resource  # pylint: disable=import-outside-toplevel
+
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == "darwin":
+            return max_rss
+        return max_rss * 1024
+
+
+class ORMTeamJoined:
+    """A team holding ORM objects, with per-instance sets of its members
+    and a list of valid emails (the representation before the compact
+    snapshot records).
+    """
+
+    def __init__(self, team, users, team_members):
+        self.id = team.id
+        self.school = team.school
+        self.division = team.division
+        self.number = team.number
+
+        self.school_team_code = (team.school.name, team.division, team.number)
+        self.name = fetch_tms.school_team_code_to_str(*self.school_team_code)
+
+        valid_emails = set()
+        self._all_user_emails = set()
+        self._all_user_ids = set()
+
+        def _get_user(user_id):
+            user = users[user_id]
+            self._all_user_emails.add(user.email)
+            self._all_user_ids.add(user.id)
+            if user.email_valid:
+                valid_emails.add(user.email)
+            return user
+
+        slot_user_ids = {slot: [] for slot in TeamMember.SLOTS}
+        for member in team_members.get(team.id, []):
+            slot_user_ids[member.slot].append(member.user_id)
+
+        def _get_slot_user(slot):
+            user_ids = slot_user_ids[slot]
+            if len(user_ids) == 0:
+                return None
+            return _get_user(user_ids[0])
+
+        self.light = _get_slot_user("light")
+        self.middle = _get_slot_user("middle")
+        self.heavy = _get_slot_user("heavy")
+        self.alternates = [
+            _get_user(user_id)
+            for user_id in sorted(slot_user_ids["alternate"])
+        ]
+
+        self._valid_emails = sorted(valid_emails)
+
+
+def load_orm():
+    schools = sql_db.session.query(School).all()
+    users = (
+        sql_db.session.query(User)
+        .options(sqlalchemy.orm.joinedload(User.school))
+        .all()
+    )
+    teams = (
+        sql_db.session.query(Team)
+        .options(sqlalchemy.orm.joinedload(Team.school))
+        .all()
+    )
+    users_by_id = {user.id: user for user in users}
+    team_members = {}
+    for member in sql_db.session.query(TeamMember):
+        team_members.setdefault(member.team_id, []).append(member)
+    joined_teams = sorted(
+        (ORMTeamJoined(team, users_by_id, team_members) for team in teams),
+        key=fetch_tms.team_sort_key,
+    )
+    return schools, users, joined_teams
+
+
+def load_snapshot():
+    return db.roster.RosterSnapshot.load(0)
+
+
+LOADERS = {
+    "orm": ("ORM objects", load_orm),
+    "snapshot": ("Compact snapshot", load_snapshot),
+}
+
+# =============================================================================
+
+
+def make_app(database_uri):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = database_uri
+    db.init_app(app)
+    return app
+
+
+def measure(database_uri, variant):
+    """Loads the roster with the given variant and prints the resident
+    set size before and after loading, in bytes.
+    """
+    app = make_app(database_uri)
+    with app.app_context():
+        # connect and warm up the mappers before measuring
+        sql_db.session.query(School).first()
+        sql_db.session.query(User).first()
+        gc.collect()
+        before = get_rss()
+        loaded = LOADERS[variant][1]()
+        gc.collect()
+        after = get_rss()
+        print(before, after)
+        del loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--teams", type=int, default=500)
+    parser.add_argument("--measure", choices=LOADERS.keys(), help="internal")
+    parser.add_argument("--database-uri", help="internal")
+    args = parser.parse_args()
+
+    if args.measure is not None:
+        measure(args.database_uri, args.measure)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        database_uri = f"sqlite:///{Path(tmp_dir) / 'roster.db'}"
+        app = make_app(database_uri)
+        roster = make_roster(args.teams * TEAM_SIZE, team_size=TEAM_SIZE)
+        with app.app_context():
+            sql_db.create_all()
+            error_msg, _ = db.roster.set_roster(roster)
+            if error_msg is not None:
+                raise RuntimeError(error_msg)
+            sql_db.engine.dispose()
+        print(
+            f"Roster: {len(roster['schools'])} schools, "
+            f"{len(roster['users'])} users, {len(roster['teams'])} teams"
+        )
+
+        for variant, (label, _) in LOADERS.items():
+            output = subprocess.run(
+                [
+                    sys.executable,
+                    __file__,
+                    "--measure",
+                    variant,
+                    "--database-uri",
+                    database_uri,
+                ],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            before, after = map(int, output.split())
+            print(
+                f"{label}: {after / 2**20:.1f} MiB RSS "
+                f"(+{(after - before) / 2**20:.1f} MiB for the roster)"
+            )
+
+
+if __name__ == "__main__":
+    main()
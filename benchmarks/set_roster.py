@@ -0,0 +1,162 @@
+"""
+Benchmark of saving a synthetic roster to the database with
+`db.roster.set_roster()`, compared to adding every row through the ORM.
+
+Usage:
+    python benchmarks/set_roster.py [--athletes ATHLETES] [--database-uri URI]
+"""
+
+# =============================================================================
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from flask import Flask
+
+sys.path.insert(0, str((Path(__file__).parent / ".." / "src").resolve()))
+
+# pylint: disable=wrong-import-position
+import db  # noqa: E402
+from db._utils import clear_tables, query  # noqa: E402
+from db.models import School, Team, TeamMember, User  # noqa: E402
+from db.models import db as sql_db  # noqa: E402
+from utils import fetch_tms  # noqa: E402
+
+# =============================================================================
+
+
+def make_roster(num_athletes, team_size=4):
+    """Makes a synthetic roster in the format returned by
+    `fetch_tms.fetch_roster()`.
+    """
+    num_schools = max(1, num_athletes // 40)
+    schools = [f"School {i}" for i in range(num_schools)]
+    users = []
+    teams = []
+    for i in range(num_athletes):
+        school = schools[i % num_schools]
+        users.append(
+            {
+                "first_name": "Athlete",
+                "last_name": str(i),
+                "email": f"athlete{i}@example.com",
+                "role": "ATHLETE",
+                "school": school,
+            }
+        )
+    for i, school in enumerate(schools):
+        users.append(
+            {
+                "first_name": "Coach",
+                "last_name": str(i),
+                "email": f"coach{i}@example.com",
+                "role": "COACH",
+                "school": school,
+            }
+        )
+    athletes_by_school = {}
+    for user in users:
+        if user["role"] == "ATHLETE":
+            athletes_by_school.setdefault(user["school"], []).append(
+                user["email"]
+            )
+    for school, emails in athletes_by_school.items():
+        for j in range(0, len(emails) - team_size + 1, team_size):
+            division = fetch_tms.DIVISIONS[(j // team_size) % 9]
+            light, middle, heavy, *alternates = emails[j : j + team_size]
+            teams.append(
+                {
+                    "school": school,
+                    "division": division,
+                    "number": j // team_size + 1,
+                    "light": light,
+                    "middle": middle,
+                    "heavy": heavy,
+                    "alternates": alternates,
+                }
+            )
+    return {"schools": schools, "users": users, "teams": teams}
+
+
+def set_roster_orm(roster):
+    """Saves the roster by clearing the tables and adding each row
+    through the ORM, then querying the tables again for the ids.
+    """
+    clear_tables(TeamMember, Team, User, School)
+    for school_name in sorted(roster["schools"]):
+        sql_db.session.add(School(school_name))
+    school_ids = {school.name: school.id for school in query(School)}
+    for user_info in roster["users"]:
+        sql_db.session.add(
+            User(
+                user_info["first_name"],
+                user_info["last_name"],
+                user_info["email"],
+                user_info["role"],
+                school_ids[user_info["school"]],
+            )
+        )
+    athlete_ids = {
+        user.email: user.id for user in query(User, {"role": "ATHLETE"})
+    }
+    for team_info in roster["teams"]:
+        team = Team(
+            school_ids[team_info["school"]],
+            team_info["division"],
+            team_info["number"],
+        )
+        sql_db.session.add(team)
+        sql_db.session.flush()
+        members = [
+            (team_info[slot], slot) for slot in ("light", "middle", "heavy")
+        ]
+        members.extend(
+            (email, "alternate") for email in team_info["alternates"]
+        )
+        for email, slot in members:
+            sql_db.session.add(TeamMember(team.id, athlete_ids[email], slot))
+    sql_db.session.commit()
+
+
+def set_roster_bulk(roster):
+    error_msg, _ = db.roster.set_roster(roster)
+    if error_msg is not None:
+        raise RuntimeError(error_msg)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--athletes", type=int, default=2000)
+    parser.add_argument("--database-uri", default="sqlite://")
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = args.database_uri
+    db.init_app(app)
+
+    roster = make_roster(args.athletes)
+    print(
+        f"Roster: {len(roster['schools'])} schools, "
+        f"{len(roster['users'])} users, {len(roster['teams'])} teams"
+    )
+
+    with app.app_context():
+        sql_db.create_all()
+        for label, func, clear_first in (
+            ("ORM (clear and add)", set_roster_orm, True),
+            ("Bulk (empty tables)", set_roster_bulk, True),
+            ("Bulk (unchanged roster)", set_roster_bulk, False),
+        ):
+            if clear_first:
+                db.roster.clear_roster()
+            start = time.perf_counter()
+            func(roster)
+            seconds = time.perf_counter() - start
+            print(f"{label}: {seconds * 1000:.1f} ms")
+        db.roster.clear_roster()
+
+
+if __name__ == "__main__":
+    main()
@@ -11,7 +11,7 @@ from werkzeug.exceptions import NotFound
 import db
 import views
 from config import get_config
-from utils import flask_utils
+from utils import flask_utils, sheets_rate_limit, tms_poller
 from utils.auth import (
     get_email,
     is_logged_in,
@@ -39,6 +39,12 @@ CSRFProtect().init_app(app)
 # Set up database
 db.init_app(app)
 
+# Set up rate limiting of the Google Sheets API requests
+sheets_rate_limit.init_app(app)
+
+# Set up background polling of the TMS match statuses
+tms_poller.init_app(app)
+
 
 @app.context_processor
 def inject_template_variables():
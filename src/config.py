@@ -30,6 +30,24 @@ class Config:
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # The number of seconds between each background poll of the TMS match
+    # statuses (disabled if not set)
+    TMS_POLL_INTERVAL = None
+    # The maximum number of random seconds added to each poll interval
+    TMS_POLL_JITTER = 0
+    # The number of seconds that fetched TMS worksheet values are reused for
+    # by all the server processes (not cached if 0)
+    TMS_SNAPSHOT_TTL = 10
+
+    # The maximum number of Google Sheets API requests per minute for each
+    # server process (not limited if not set)
+    SHEETS_REQUESTS_PER_MINUTE = 60
+    # The maximum number of requests that can be made at once (the number of
+    # requests per minute if None)
+    SHEETS_REQUESTS_BURST = 10
+    # The maximum number of times to retry a rate limited request
+    SHEETS_MAX_RETRIES = 5
+
 
 class ProdConfig(Config):
     """The config object for production."""
@@ -43,6 +61,20 @@ class ProdConfig(Config):
     else:
         SQLALCHEMY_DATABASE_URI = None
 
+    if os.getenv("TMS_POLL_INTERVAL"):
+        TMS_POLL_INTERVAL = float(os.getenv("TMS_POLL_INTERVAL"))
+    TMS_POLL_JITTER = float(os.getenv("TMS_POLL_JITTER", "0"))
+    if os.getenv("TMS_SNAPSHOT_TTL"):
+        TMS_SNAPSHOT_TTL = float(os.getenv("TMS_SNAPSHOT_TTL"))
+    if os.getenv("SHEETS_REQUESTS_PER_MINUTE"):
+        SHEETS_REQUESTS_PER_MINUTE = float(
+            os.getenv("SHEETS_REQUESTS_PER_MINUTE")
+        )
+    if os.getenv("SHEETS_REQUESTS_BURST"):
+        SHEETS_REQUESTS_BURST = int(os.getenv("SHEETS_REQUESTS_BURST"))
+    if os.getenv("SHEETS_MAX_RETRIES"):
+        SHEETS_MAX_RETRIES = int(os.getenv("SHEETS_MAX_RETRIES"))
+
 
 class DevConfig(Config):
     """The config object for development."""
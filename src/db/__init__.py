@@ -13,6 +13,7 @@ from db import (
     roster,
     sent_emails,
     subscriptions,
+    worksheet_snapshots,
 )
 from db.models import db
 
@@ -26,6 +27,7 @@ __all__ = (
     "subscriptions",
     "match_status",
     "sent_emails",
+    "worksheet_snapshots",
 )
 
 # =============================================================================
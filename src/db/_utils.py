@@ -4,6 +4,10 @@ Utilities for working with the database.
 
 # =============================================================================
 
+import sqlalchemy
+import sqlalchemy.dialects.postgresql
+import sqlalchemy.dialects.sqlite
+
 from db.models import db
 
 # =============================================================================
@@ -30,9 +34,199 @@ def query(model, filters=None):
     return result
 
 
+def columns_in(columns, values):
+    """Returns a filter for rows whose columns match any of the given
+    tuples of values.
+
+    This is the same as a tuple IN, but expanded into ORs of equalities
+    so that a composite index on the columns can be used by both SQLite
+    and Postgres.
+
+    Args:
+        columns (Tuple[Column, ...]): The columns to match.
+        values (Iterable[Tuple[Any, ...]]): The values of the columns.
+            Should not be empty.
+    """
+    return sqlalchemy.or_(
+        *(
+            sqlalchemy.and_(
+                *(column == value for column, value in zip(columns, row))
+            )
+            for row in values
+        )
+    )
+
+
 # =============================================================================
 
 
+def bulk_insert(model, rows, key_column=None, id_column=None):
+    """Inserts the given rows in the current transaction with a bulk
+    INSERT statement, bypassing the ORM unit of work.
+
+    The rows are sent in batches of multiple VALUES (with RETURNING if
+    the ids are needed) rather than one statement per row.
+
+    Args:
+        model (db.Model): The model to insert into.
+        rows (List[Dict[str, Any]]): The column values of each row.
+        key_column (Optional[Union[Column, Tuple[Column, ...]]]): A
+            unique column (or columns) of the model. If given with
+            `id_column`, the generated ids are returned.
+        id_column (Optional[Column]): The id column of the model.
+
+    Returns:
+        Dict[Any, Any]: A mapping from the key of each inserted row (a
+            tuple if multiple key columns were given) to its id, if
+            `key_column` and `id_column` were given.
+    """
+    if len(rows) == 0:
+        return {}
+    statement = sqlalchemy.insert(model)
+    if key_column is None or id_column is None:
+        db.session.execute(statement, rows)
+        return {}
+    is_multi_key = isinstance(key_column, tuple)
+    key_columns = key_column if is_multi_key else (key_column,)
+    # the order of the returned rows is not guaranteed, so return the key
+    # of each row as well
+    result = db.session.execute(
+        statement.returning(id_column, *key_columns), rows
+    )
+    return {
+        (tuple(row[1:]) if is_multi_key else row[1]): row[0] for row in result
+    }
+
+
+def _dialect_insert(model):
+    """Returns an INSERT statement for the given model that supports
+    `ON CONFLICT` clauses for the current database.
+    """
+    dialect_name = db.engine.dialect.name
+    if dialect_name == "postgresql":
+        return sqlalchemy.dialects.postgresql.insert(model)
+    if dialect_name == "sqlite":
+        return sqlalchemy.dialects.sqlite.insert(model)
+    raise ValueError(f"Upsert not supported for {dialect_name!r}")
+
+
+def _key_columns(key_column):
+    """Returns the given key column (or columns) as a list."""
+    if isinstance(key_column, tuple):
+        return list(key_column)
+    return [key_column]
+
+
+def bulk_insert_missing(model, rows, key_column):
+    """Inserts the given rows in the current transaction, skipping the
+    rows whose key already exists, with a single
+    `INSERT ... ON CONFLICT DO NOTHING` statement.
+
+    Only Postgres and SQLite are supported.
+
+    Args:
+        model (db.Model): The model to insert into.
+        rows (List[Dict[str, Any]]): The column values of each row.
+        key_column (Union[Column, Tuple[Column, ...]]): The unique
+            column (or columns) of the model to detect conflicts on.
+
+    Returns:
+        int: The number of rows inserted.
+    """
+    if len(rows) == 0:
+        return 0
+    statement = (
+        _dialect_insert(model)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=_key_columns(key_column))
+    )
+    return db.session.execute(statement).rowcount
+
+
+def bulk_upsert(
+    model,
+    rows,
+    key_column,
+    changed_column=None,
+    newer_column=None,
+    keep_unchanged=(),
+    returning=None,
+):
+    """Inserts the given rows in the current transaction, updating the
+    existing rows with the same key instead, with a single
+    `INSERT ... ON CONFLICT DO UPDATE` statement.
+
+    Only Postgres and SQLite are supported.
+
+    Args:
+        model (db.Model): The model to upsert into.
+        rows (List[Dict[str, Any]]): The column values of each row. All
+            the rows should have the same columns, including at least
+            one column that is not a key.
+        key_column (Union[Column, Tuple[Column, ...]]): The unique
+            column (or columns) of the model to detect conflicts on.
+        changed_column (Optional[Column]): If given, existing rows are
+            only updated if the value of this column is different.
+        newer_column (Optional[Column]): If given, existing rows are
+            only updated if the value of this column is older than the
+            new value (or null), so that a stale write can't overwrite
+            a newer one.
+        keep_unchanged (Tuple[Column, ...]): Columns that keep their
+            existing values unless the value of `changed_column` is
+            different. If given, existing rows are updated even if
+            `changed_column` is the same, so that the other columns
+            (such as `newer_column`) still move forward.
+        returning (Optional[Tuple[Column, ...]]): If given, the values
+            of these columns are returned for the rows that were
+            inserted or updated.
+
+    Returns:
+        Union[int, List[Tuple]]: The number of rows inserted or updated,
+            or the values of the `returning` columns of those rows.
+    """
+    if len(rows) == 0:
+        return 0 if returning is None else []
+    key_columns = _key_columns(key_column)
+    key_names = {column.key for column in key_columns}
+    statement = _dialect_insert(model).values(rows)
+    update_values = {
+        key: statement.excluded[key]
+        for key in rows[0].keys()
+        if key not in key_names
+    }
+    if len(update_values) == 0:
+        raise ValueError("Upsert rows have no columns to update")
+    conditions = []
+    if changed_column is not None:
+        is_changed = changed_column.is_distinct_from(
+            statement.excluded[changed_column.key]
+        )
+        if len(keep_unchanged) == 0:
+            conditions.append(is_changed)
+        for column in keep_unchanged:
+            update_values[column.key] = sqlalchemy.case(
+                (is_changed, statement.excluded[column.key]), else_=column
+            )
+    if newer_column is not None:
+        conditions.append(
+            sqlalchemy.or_(
+                newer_column.is_(None),
+                newer_column < statement.excluded[newer_column.key],
+            )
+        )
+    statement = statement.on_conflict_do_update(
+        index_elements=key_columns,
+        set_=update_values,
+        where=sqlalchemy.and_(*conditions) if conditions else None,
+    )
+    if returning is None:
+        return db.session.execute(statement).rowcount
+    return [
+        tuple(row)
+        for row in db.session.execute(statement.returning(*returning))
+    ]
+
+
 def _set(obj, *, commit=True, **values):
     """Sets the given kwargs values on the given object.
 
@@ -179,6 +179,33 @@ def set_roster_last_fetched_time():
     return True
 
 
+def get_roster_version():
+    """Returns the current version of the roster, which changes whenever
+    the roster tables change.
+    """
+    global_state = get()
+    return global_state.roster_version
+
+
+def increment_roster_version(commit=True):
+    """Increments the roster version. Should be called in the same
+    transaction as any changes to the roster tables.
+
+    Returns:
+        bool: Whether the operation was successful.
+    """
+    global_state = get()
+    # increment in the database to be safe with concurrent increments
+    query(GlobalState, {"id": global_state.id}).update(
+        {GlobalState.roster_version: GlobalState.roster_version + 1},
+        synchronize_session=False,
+    )
+    db.session.expire(global_state, ["roster_version"])
+    if commit:
+        db.session.commit()
+    return True
+
+
 def get_last_matches_query():
     """Returns the global last matches query, or None if no query was
     made yet.
@@ -197,6 +224,39 @@ def set_last_matches_query(matches_query):
     return True
 
 
+def get_tms_last_poll(tz=utils.EASTERN_TZ):
+    """Returns the info about the last background poll of the TMS match
+    statuses, from whichever process polled.
+
+    Returns:
+        Tuple[Optional[datetime], Optional[float], Optional[str]]:
+            When the last poll started, the number of seconds it took,
+            and its error message, if any. All None if there was no poll
+            yet.
+    """
+    global_state = get()
+    return (
+        utils.dt_to_timezone(global_state.tms_last_poll_time, tz),
+        global_state.tms_last_poll_duration,
+        global_state.tms_last_poll_error,
+    )
+
+
+def set_tms_last_poll(poll_time, duration, error_msg):
+    """Sets the info about the last background poll of the TMS match
+    statuses.
+
+    Returns:
+        bool: Whether the operation was successful.
+    """
+    _set_global(
+        tms_last_poll_time=poll_time,
+        tms_last_poll_duration=duration,
+        tms_last_poll_error=error_msg,
+    )
+    return True
+
+
 def clear_roster_related_fields():
     """Clears the global last fetched time of the roster and the last
     matches query.
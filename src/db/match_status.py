@@ -1,15 +1,24 @@
 """
-Helper methods for the match status, which includes the MatchStatus and
-EmailSent tables.
+Helper methods for the match status, which includes the MatchStatus,
+MatchStatusTransition, and EmailSent tables.
 """
 
 # =============================================================================
 
 from datetime import datetime
 
+import sqlalchemy
+
 import utils
-from db._utils import _set, clear_tables, query
-from db.models import EmailSent, TMSMatchStatus, db
+from db._utils import bulk_insert_missing, bulk_upsert, clear_tables, query
+from db.models import (
+    EmailRecipient,
+    EmailSent,
+    MatchStatusCode,
+    MatchStatusTransition,
+    TMSMatchStatus,
+    db,
+)
 
 # =============================================================================
 
@@ -33,28 +42,19 @@ def _get_all_tms_match_statuses(match_numbers_filter=None):
     from match number to TMSMatchStatus object, optionally filtering by
     the given iterable of match numbers.
     """
-    if match_numbers_filter is None or isinstance(
+    match_statuses = query(TMSMatchStatus)
+    if match_numbers_filter is not None and not isinstance(
         match_numbers_filter, _ContainsEverything
     ):
-        return {
-            match_status.match_number: match_status
-            for match_status in query(TMSMatchStatus).all()
-        }
-    match_numbers_filter = set(match_numbers_filter)
-    if len(match_numbers_filter) == 0:
-        return {}
-    if len(match_numbers_filter) == 1:
-        # fetch the single match instead of iterating over everything
-        match_status = query(
-            TMSMatchStatus, {"match_number": next(iter(match_numbers_filter))}
-        ).first()
-        if match_status is None:
+        match_numbers_filter = set(match_numbers_filter)
+        if len(match_numbers_filter) == 0:
             return {}
-        return {match_status.match_number: match_status}
+        match_statuses = match_statuses.filter(
+            TMSMatchStatus.match_number.in_(match_numbers_filter)
+        )
     return {
         match_status.match_number: match_status
-        for match_status in query(TMSMatchStatus).all()
-        if match_status.match_number in match_numbers_filter
+        for match_status in match_statuses
     }
 
 
@@ -78,11 +78,13 @@ def get_matches_status(match_numbers=None, tz=utils.EASTERN_TZ):
                     when the TMS status was last updated
                 'emails': a list of emails sent for this match, sorted
                     by time sent, in the format:
+                        'id': the id of the sent email (to get its
+                            recipients)
                         'match_number': the target match number
                         'template_name': the Mailchimp template used
                         'subject': the email subject
                         'time_sent': when the email was sent (as a str)
-                        'recipients': a list of recipient emails
+                        'num_recipients': the number of recipients
     """
 
     if match_numbers is None:
@@ -96,16 +98,29 @@ def get_matches_status(match_numbers=None, tz=utils.EASTERN_TZ):
     # maps: match number -> tms match status object
     tms_match_statuses = _get_all_tms_match_statuses(match_numbers)
 
-    # get the emails
+    # get the emails, grouped by match and sorted by time sent
     # maps: match number -> list of email objects
     emails_sent = {}
-    for email_sent in query(EmailSent).all():
+    emails_sent_query = (
+        db.session.query(
+            EmailSent, sqlalchemy.func.count(EmailRecipient.email)
+        )
+        .outerjoin(
+            EmailRecipient, EmailRecipient.email_sent_id == EmailSent.id
+        )
+        .group_by(EmailSent.id)
+    )
+    if not isinstance(match_numbers, _ContainsEverything):
+        emails_sent_query = emails_sent_query.filter(
+            EmailSent.match_number.in_(match_numbers)
+        )
+    for email_sent, num_recipients in emails_sent_query.order_by(
+        EmailSent.match_number, EmailSent.time_sent, EmailSent.id
+    ):
         match_number = email_sent.match_number
-        if match_number not in match_numbers:
-            continue
         if match_number not in emails_sent:
             emails_sent[match_number] = []
-        emails_sent[match_number].append(email_sent)
+        emails_sent[match_number].append((email_sent, num_recipients))
 
     # combine into a single status for each seen match
     match_status_infos = {}
@@ -133,17 +148,16 @@ def get_matches_status(match_numbers=None, tz=utils.EASTERN_TZ):
         else:
             status_info["emails"] = [
                 {
+                    "id": email_sent.id,
                     "match_number": email_sent.match_number,
                     "template_name": email_sent.template_name,
                     "subject": email_sent.subject,
                     "time_sent": utils.dt_str(
                         utils.dt_to_timezone(email_sent.time_sent, tz)
                     ),
-                    "recipients": email_sent.email_recipients(),
+                    "num_recipients": num_recipients,
                 }
-                for email_sent in sorted(
-                    match_emails_sent, key=lambda e: e.time_sent
-                )
+                for email_sent, num_recipients in match_emails_sent
             ]
         match_status_infos[match_number] = status_info
 
@@ -154,53 +168,225 @@ def get_matches_status(match_numbers=None, tz=utils.EASTERN_TZ):
 
 
 def clear_matches_status():
-    """Clears the TMS match statuses.
+    """Clears the TMS match statuses and their history.
 
     Returns:
         bool: Whether the operation was successful.
     """
-    clear_tables(TMSMatchStatus)
+    clear_tables(MatchStatusTransition, MatchStatusCode, TMSMatchStatus)
     return True
 
 
 # =============================================================================
 
 
-def set_matches_tms_status(matches_info):
-    """Saves the TMS status for all the given matches with the current
-    timestamp as the time fetched.
+def _get_status_codes(statuses):
+    """Returns a mapping from the given statuses to their codes, adding
+    codes for any new statuses.
+    """
+    statuses = set(statuses)
+    if len(statuses) == 0:
+        return {}
+
+    def _query_codes():
+        return dict(
+            db.session.query(MatchStatusCode.status, MatchStatusCode.code)
+            .filter(MatchStatusCode.status.in_(statuses))
+            .all()
+        )
+
+    status_codes = _query_codes()
+    new_statuses = statuses.difference(status_codes.keys())
+    if len(new_statuses) == 0:
+        return status_codes
+    # only insert the statuses without a code, since each attempted insert
+    # uses up a code; another process may have just added them, though
+    bulk_insert_missing(
+        MatchStatusCode,
+        [{"status": status} for status in sorted(new_statuses)],
+        MatchStatusCode.status,
+    )
+    return _query_codes()
+
+
+# =============================================================================
+
+
+def set_matches_tms_status(
+    matches_info, time_fetched=None, match_divisions=None
+):
+    """Saves the TMS status for all the given matches.
+
+    All the statuses are saved with a single bulk upsert, which moves
+    the last fetched time of every match forward, but only moves the
+    last updated time of the matches that are new or whose status
+    changed (so it is when the status last changed). Each of those
+    matches also gets a new status transition.
+
+    Since multiple processes may save statuses fetched at different
+    times, a status is not saved if the match already has a status
+    fetched at the same time or later (even if that status didn't
+    change). This keeps an older fetch that finishes last from
+    overwriting a newer status or adding an out-of-order transition.
 
     Args:
         matches_info (Dict[int, str]): A mapping from match number to
             TMS status.
-        time_fetched (datetime): When the TMS spreadsheet was fetched
-            with this information.
+        time_fetched (Optional[datetime]): When the TMS spreadsheet was
+            fetched with this information. Defaults to the current time.
+        match_divisions (Optional[Dict[int, str]]): A mapping from match
+            number to division, saved with the status transitions.
 
     Returns:
         bool: Whether the operation was successful.
     """
-    if len(matches_info) == 0:
+    if time_fetched is None:
+        time_fetched = datetime.utcnow()
+    rows = [
+        {
+            "match_number": match_number,
+            "status": tms_status,
+            "last_updated": time_fetched,
+            "last_fetched": time_fetched,
+        }
+        for match_number, tms_status in sorted(matches_info.items())
+        # skip missing values
+        if tms_status != ""
+    ]
+    if len(rows) == 0:
         return True
-    time_fetched = datetime.utcnow()
-    match_statuses = _get_all_tms_match_statuses(matches_info.keys())
-    any_changed = False
-    for match_number, tms_status in matches_info.items():
-        if tms_status == "":
-            # missing value
-            continue
-        # last updated time will always require database commit
-        any_changed = True
-        match_status = match_statuses.get(match_number, None)
-        if match_status is None:
-            # create new
-            match_status = TMSMatchStatus(match_number)
-            db.session.add(match_status)
-        _set(
-            match_status,
-            commit=False,
-            status=tms_status,
-            last_updated=time_fetched,
+    # every newer fetch is saved, but the last updated time only moves
+    # when the status changes
+    saved = bulk_upsert(
+        TMSMatchStatus,
+        rows,
+        TMSMatchStatus.match_number,
+        changed_column=TMSMatchStatus.status,
+        newer_column=TMSMatchStatus.last_fetched,
+        keep_unchanged=(TMSMatchStatus.last_updated,),
+        returning=(
+            TMSMatchStatus.match_number,
+            TMSMatchStatus.status,
+            TMSMatchStatus.last_updated,
+        ),
+    )
+    changed = [
+        (match_number, status)
+        for match_number, status, last_updated in saved
+        if last_updated == time_fetched
+    ]
+    if len(changed) > 0:
+        if match_divisions is None:
+            match_divisions = {}
+        status_codes = _get_status_codes(status for _, status in changed)
+        # a transition at the same time for the same match is a duplicate
+        bulk_insert_missing(
+            MatchStatusTransition,
+            [
+                {
+                    "match_number": match_number,
+                    "time_changed": time_fetched,
+                    "status_code": status_codes[status],
+                    # skip missing values
+                    "division": match_divisions.get(match_number) or None,
+                }
+                for match_number, status in changed
+            ],
+            (
+                MatchStatusTransition.match_number,
+                MatchStatusTransition.time_changed,
+            ),
         )
-    if any_changed:
-        db.session.commit()
+    db.session.commit()
     return True
+
+
+# =============================================================================
+
+
+def _percentile(sorted_values, percentile):
+    """Returns the given percentile of the sorted values, interpolating
+    linearly between the closest ranks.
+    """
+    index = (len(sorted_values) - 1) * percentile / 100
+    lower = int(index)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    fraction = index - lower
+    return (
+        sorted_values[lower] * (1 - fraction) + sorted_values[upper] * fraction
+    )
+
+
+def get_time_in_status_percentiles(percentiles=(50, 90, 95), statuses=None):
+    """Gets percentiles of how long the matches in each division spent
+    in each TMS status.
+
+    Only finished stays are counted: a match's current status is not
+    included until the match moves on to another status. Each stay is
+    counted in the division saved when the match entered the status;
+    stays without a division are ignored.
+
+    Args:
+        percentiles (Sequence[float]): The percentiles to get, from 0 to
+            100.
+        statuses (Optional[Iterable[str]]): If given, only these
+            statuses are included.
+
+    Returns:
+        Dict[str, Dict[str, Dict]]: A mapping from divisions to statuses
+            to the time spent in them, in the format:
+                'count': the number of stays in the status
+                'percentiles': a mapping from the given percentiles to
+                    the time spent in the status, in seconds
+    """
+
+    # the next status of the same match ends each stay
+    stays = sqlalchemy.select(
+        MatchStatusTransition.division,
+        MatchStatusTransition.status_code,
+        MatchStatusTransition.time_changed,
+        sqlalchemy.func.lead(
+            MatchStatusTransition.time_changed,
+            type_=MatchStatusTransition.time_changed.type,
+        )
+        .over(
+            partition_by=MatchStatusTransition.match_number,
+            order_by=MatchStatusTransition.time_changed,
+        )
+        .label("time_ended"),
+    ).subquery()
+    stays_query = (
+        db.session.query(
+            stays.c.division,
+            MatchStatusCode.status,
+            stays.c.time_changed,
+            stays.c.time_ended,
+        )
+        .join(MatchStatusCode, MatchStatusCode.code == stays.c.status_code)
+        .filter(stays.c.division.isnot(None), stays.c.time_ended.isnot(None))
+    )
+    if statuses is not None:
+        stays_query = stays_query.filter(
+            MatchStatusCode.status.in_(set(statuses))
+        )
+
+    # maps: division -> status -> list of seconds
+    durations = {}
+    for division, status, time_changed, time_ended in stays_query:
+        durations.setdefault(division, {}).setdefault(status, []).append(
+            (time_ended - time_changed).total_seconds()
+        )
+
+    time_in_status = {}
+    for division, status_durations in durations.items():
+        time_in_status[division] = {}
+        for status, seconds in status_durations.items():
+            seconds.sort()
+            time_in_status[division][status] = {
+                "count": len(seconds),
+                "percentiles": {
+                    percentile: _percentile(seconds, percentile)
+                    for percentile in percentiles
+                },
+            }
+    return time_in_status
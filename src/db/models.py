@@ -11,8 +11,11 @@ from sqlalchemy import (
     Boolean,
     Column,
     DateTime,
+    Float,
     ForeignKey,
+    Index,
     Integer,
+    SmallInteger,
     String,
     UniqueConstraint,
 )
@@ -29,9 +32,14 @@ __all__ = (
     "School",
     "User",
     "Team",
+    "TeamMember",
     "TMSMatchStatus",
+    "MatchStatusCode",
+    "MatchStatusTransition",
     "EmailSent",
+    "EmailRecipient",
     "BlastEmailSent",
+    "WorksheetSnapshot",
 )
 
 # =============================================================================
@@ -53,8 +61,19 @@ class GlobalState(db.Model):
     tms_spreadsheet_id = Column(String(), nullable=True)
     # The last time the roster was fetched from the TMS spreadsheet
     roster_last_fetched_time = Column(DateTime(timezone=False), nullable=True)
+    # Incremented whenever the roster tables change, so that cached
+    # rosters know when they are stale
+    roster_version = Column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
     # The last successful matches query
     last_matches_query = Column(String(), nullable=True)
+    # When the last background poll of the TMS match statuses started
+    tms_last_poll_time = Column(DateTime(timezone=False), nullable=True)
+    # The number of seconds the last poll took
+    tms_last_poll_duration = Column(Float(), nullable=True)
+    # The error message from the last poll, if any
+    tms_last_poll_error = Column(String(), nullable=True)
     # The Mailchimp API key
     mailchimp_api_key = Column(String(), nullable=True)
     # The id of the currently selected Mailchimp audience
@@ -147,6 +166,14 @@ class UserSubscription(db.Model):
             "number",
             name="_email_school_team_code",
         ),
+        # to look up the subscribers of teams (the unique constraint
+        # already covers looking up by email)
+        Index(
+            "ix_UserSubscriptions_school_team_code",
+            "school",
+            "division",
+            "number",
+        ),
     )
 
     def __init__(self, email, school, division, team_number):
@@ -189,6 +216,11 @@ class User(db.Model):
     role = Column(String(), nullable=False)
     school_id = Column(Integer, ForeignKey(School.id), nullable=False)
 
+    __table_args__ = (
+        # to look up the users of a school, optionally with some roles
+        Index("ix_Users_school_id_role", "school_id", "role"),
+    )
+
     def __init__(
         self, first_name, last_name, email, role, school_id, email_valid=True
     ):
@@ -211,17 +243,9 @@ class Team(db.Model):
 
     id = Column(Integer, primary_key=True)
     school_id = Column(Integer, ForeignKey(School.id), nullable=False)
-    division = Column(String(), nullable=False)
+    division = Column(String(), nullable=False, index=True)
     number = Column(Integer, nullable=False)
 
-    # Team members
-    light_id = Column(Integer, ForeignKey(User.id), nullable=True)
-    middle_id = Column(Integer, ForeignKey(User.id), nullable=True)
-    heavy_id = Column(Integer, ForeignKey(User.id), nullable=True)
-
-    # A comma-separated list of user ids
-    alternate_ids = Column(String(), nullable=False, default="")
-
     __table_args__ = (
         # could also be multi primary key, but want id for each team
         UniqueConstraint(
@@ -229,32 +253,38 @@ class Team(db.Model):
         ),
     )
 
-    def __init__(
-        self,
-        school_id,
-        division,
-        team_number,
-        light_id=None,
-        middle_id=None,
-        heavy_id=None,
-        alternate_ids=None,
-    ):
+    def __init__(self, school_id, division, team_number):
         self.school_id = school_id
         self.division = division
         self.number = team_number
-        # assume the given team members have the "ATHLETE" role
-        self.light_id = light_id
-        self.middle_id = middle_id
-        self.heavy_id = heavy_id
-        if alternate_ids is None:
-            alternate_ids = []
-        self.alternate_ids = ",".join(map(str, sorted(alternate_ids)))
 
-    def get_alternate_ids(self):
-        """Returns a list of the alternate user ids."""
-        if self.alternate_ids == "":
-            return []
-        return list(map(int, self.alternate_ids.split(",")))
+
+class TeamMember(db.Model):
+    """Model for a member of a team."""
+
+    __tablename__ = "TeamMembers"
+
+    # The possible slots of a team member, in order
+    SLOTS = ("light", "middle", "heavy", "alternate")
+
+    # a user can only be on a team once
+    team_id = Column(
+        Integer, ForeignKey(Team.id, ondelete="CASCADE"), primary_key=True
+    )
+    # indexed to look up the teams of a user
+    user_id = Column(
+        Integer,
+        ForeignKey(User.id, ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
+    )
+    # One of `SLOTS`; assumes the user has the "ATHLETE" role
+    slot = Column(String(), nullable=False)
+
+    def __init__(self, team_id, user_id, slot):
+        self.team_id = team_id
+        self.user_id = user_id
+        self.slot = slot
 
 
 # =============================================================================
@@ -271,26 +301,81 @@ class TMSMatchStatus(db.Model):
 
     match_number = Column(Integer, primary_key=True, autoincrement=False)
     status = Column(String(), nullable=True)
+    # When the status last changed
     last_updated = Column(DateTime(timezone=False), nullable=True)
+    # When the status was last fetched, even if it didn't change
+    last_fetched = Column(DateTime(timezone=False), nullable=True)
     # TODO: should this also include the team names?
 
     def __init__(self, match_number):
         self.match_number = match_number
 
 
+class MatchStatusCode(db.Model):
+    """Model for the small integer code of a TMS match status, so that
+    the status transitions don't have to store the status strings.
+    """
+
+    __tablename__ = "MatchStatusCodes"
+
+    # SQLite only generates ids for an INTEGER primary key
+    code = Column(
+        SmallInteger().with_variant(Integer, "sqlite"), primary_key=True
+    )
+    status = Column(String(), nullable=False, unique=True)
+
+    def __init__(self, status):
+        self.status = status
+
+
+class MatchStatusTransition(db.Model):
+    """Model for when the TMS status of a match changed. Rows are only
+    ever added, so the time spent in each status can be measured.
+    """
+
+    __tablename__ = "MatchStatusTransitions"
+
+    match_number = Column(Integer, primary_key=True, autoincrement=False)
+    # When the new status was first seen
+    time_changed = Column(DateTime(timezone=False), primary_key=True)
+    status_code = Column(
+        SmallInteger,
+        ForeignKey(MatchStatusCode.code, ondelete="CASCADE"),
+        nullable=False,
+    )
+    # The division of the match when the status changed, so the history
+    # doesn't depend on the match still being in the TMS spreadsheet
+    division = Column(String(), nullable=True)
+
+    def __init__(self, match_number, time_changed, status_code, division):
+        self.match_number = match_number
+        self.time_changed = time_changed
+        self.status_code = status_code
+        self.division = division
+
+
 class EmailSent(db.Model):
     """Model for when an email was sent."""
 
     __tablename__ = "EmailsSent"
+    __table_args__ = (
+        # to page through the sent emails in order of time sent
+        Index("ix_EmailsSent_time_sent_id", "time_sent", "id"),
+    )
 
     id = Column(Integer, primary_key=True)
-    match_number = Column(Integer, nullable=False)
+    match_number = Column(Integer, nullable=False, index=True)
     # The name of the Mailchimp template used for this email
     template_name = Column(String(), nullable=False)
     subject = Column(String(), nullable=False)
     time_sent = Column(DateTime(timezone=False), nullable=False)
-    # A semicolon-separated list of recipient email addresses
-    recipients = Column(String(), nullable=False)
+
+    recipients = db.relationship(
+        "EmailRecipient",
+        order_by="EmailRecipient.email",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
 
     def __init__(
         self, match_number, template_name, subject, time_sent, recipients
@@ -299,16 +384,39 @@ class EmailSent(db.Model):
         self.template_name = template_name
         self.subject = subject
         self.time_sent = time_sent
-        self.recipients = ";".join(sorted(recipients))
+        self.recipients = [
+            EmailRecipient(email) for email in sorted(set(recipients))
+        ]
 
     def email_recipients(self):
-        return self.recipients.split(";")
+        return [recipient.email for recipient in self.recipients]
+
+
+class EmailRecipient(db.Model):
+    """Model for a recipient of a sent email."""
+
+    __tablename__ = "EmailRecipients"
+
+    email_sent_id = Column(
+        Integer,
+        ForeignKey(EmailSent.id, ondelete="CASCADE"),
+        primary_key=True,
+    )
+    # indexed to look up the emails sent to a recipient
+    email = Column(String(), primary_key=True, index=True)
+
+    def __init__(self, email):
+        self.email = email
 
 
 class BlastEmailSent(db.Model):
     """Model for when a blast email was sent."""
 
     __tablename__ = "BlastEmailsSent"
+    __table_args__ = (
+        # to page through the sent emails in order of time sent
+        Index("ix_BlastEmailsSent_time_sent_id", "time_sent", "id"),
+    )
 
     id = Column(Integer, primary_key=True)
     # The name of the Mailchimp template used for this email
@@ -331,10 +439,43 @@ class BlastEmailSent(db.Model):
         self.division = division
         self.tag = tag
 
+    @staticmethod
+    def recipient_str(division=None, tag=None):
+        """Returns a string describing the recipients of a blast email
+        sent to the given division or tag.
+        """
+        if tag is not None:
+            return f"Tag {tag!r}"
+        if division is not None:
+            return f"Division {division!r}"
+        return "Entire audience"
+
     @property
     def recipient(self):
-        if self.tag is not None:
-            return f"Tag {self.tag!r}"
-        if self.division is not None:
-            return f"Division {self.division!r}"
-        return "Entire audience"
+        return self.recipient_str(self.division, self.tag)
+
+
+# =============================================================================
+
+# TMS spreadsheet cache
+
+
+class WorksheetSnapshot(db.Model):
+    """Model for a snapshot of the values fetched from a worksheet in the
+    TMS spreadsheet, shared by all the server processes.
+    """
+
+    __tablename__ = "WorksheetSnapshots"
+
+    spreadsheet_id = Column(String(), primary_key=True)
+    worksheet_name = Column(String(), primary_key=True)
+    # The fetched values as a JSON string
+    data = Column(String(), nullable=True)
+    # When the values were fetched (or last confirmed to be unchanged)
+    time_fetched = Column(DateTime(timezone=False), nullable=True)
+    # The version of the spreadsheet the values were fetched from
+    fingerprint = Column(String(), nullable=True)
+
+    def __init__(self, spreadsheet_id, worksheet_name):
+        self.spreadsheet_id = spreadsheet_id
+        self.worksheet_name = worksheet_name
@@ -1,22 +1,83 @@
 """
-Helper methods for the roster, which includes the Schools, Users, and
-Teams tables.
+Helper methods for the roster, which includes the Schools, Users, Teams,
+and TeamMembers tables.
 """
 
 # =============================================================================
 
+import sys
 from functools import partial
+from types import MappingProxyType
 
-from db._utils import clear_tables, query
-from db.models import School, Team, User, db
+import sqlalchemy
+import sqlalchemy.exc
+
+from db import global_state
+from db._utils import _set, bulk_insert, clear_tables, columns_in, query
+from db.models import School, Team, TeamMember, User, db
 from utils import fetch_tms
 
 # =============================================================================
 
 
+class SchoolRecord:
+    """A compact, read-only copy of a school."""
+
+    __slots__ = ("id", "name")
+
+    def __init__(self, school):
+        self.id = school.id
+        self.name = sys.intern(school.name)
+
+
+class UserRecord:
+    """A compact, read-only copy of a user.
+
+    Accepts anything with the same attributes as a `User`, such as a row
+    of its columns.
+    """
+
+    __slots__ = (
+        "id",
+        "first_name",
+        "last_name",
+        "email",
+        "email_valid",
+        "role",
+        "school",
+    )
+
+    def __init__(self, user, school):
+        self.id = user.id
+        self.first_name = user.first_name
+        self.last_name = user.last_name
+        self.email = user.email
+        self.email_valid = user.email_valid
+        self.role = sys.intern(user.role)
+        self.school = school
+
+    @property
+    def full_name(self):
+        return f"{self.first_name} {self.last_name}".strip()
+
+
 class TeamJoined:
     """A team, with objects referencing each of its team members."""
 
+    __slots__ = (
+        "id",
+        "school",
+        "division",
+        "number",
+        "school_team_code",
+        "name",
+        "light",
+        "middle",
+        "heavy",
+        "alternates",
+        "_valid_emails",
+    )
+
     @classmethod
     def per_user(cls):
         """Returns a callable that returns a `TeamJoined` object that
@@ -35,21 +96,52 @@ class TeamJoined:
                 seen_users[user_id] = user
             return user
 
-        return partial(TeamJoined, get_user_func=get_user)
+        def get_members(team_id):
+            return query(TeamMember, {"team_id": team_id}).all()
+
+        def get_school(school_id):
+            return query(School, {"id": school_id}).first()
+
+        return partial(
+            TeamJoined,
+            get_user_func=get_user,
+            get_members_func=get_members,
+            get_school_func=get_school,
+        )
 
     @classmethod
-    def all_users(cls):
+    def all_users(cls, users=None, members=None, schools=None):
         """Returns a callable that returns a `TeamJoined` object.
 
-        All the users in the database will be fetched and cached first.
+        All the users, team members, and schools in the database will be
+        fetched and cached first, unless they are given.
         """
 
-        users = {user.id: user for user in query(User).all()}
+        if users is None:
+            users = query(User).all()
+        if members is None:
+            members = query(TeamMember).all()
+        if schools is None:
+            schools = query(School).all()
+        users = {user.id: user for user in users}
+        schools = {school.id: school for school in schools}
+        # maps: team id -> list of team members
+        team_members = {}
+        for member in members:
+            team_members.setdefault(member.team_id, []).append(member)
 
         def get_user(user_id):
             return users.get(user_id, None)
 
-        return partial(TeamJoined, get_user_func=get_user)
+        def get_members(team_id):
+            return team_members.get(team_id, [])
+
+        return partial(
+            TeamJoined,
+            get_user_func=get_user,
+            get_members_func=get_members,
+            get_school_func=schools.get,
+        )
 
     @classmethod
     def join_teams(cls, teams, sort=False):
@@ -58,18 +150,16 @@ class TeamJoined:
             return sorted(joined_teams_iter, key=fetch_tms.team_sort_key)
         return joined_teams_iter
 
-    def __init__(self, team, get_user_func):
+    def __init__(self, team, get_user_func, get_members_func, get_school_func):
         self.id = team.id
-        self.school = team.school
-        self.division = team.division
+        self.school = get_school_func(team.school_id)
+        self.division = sys.intern(team.division)
         self.number = team.number
 
-        self.school_team_code = (team.school.name, team.division, team.number)
+        self.school_team_code = (self.school.name, self.division, self.number)
         self.name = fetch_tms.school_team_code_to_str(*self.school_team_code)
 
         valid_emails = set()
-        self._all_user_emails = set()
-        self._all_user_ids = set()
 
         def _get_user(user_id):
             if user_id is None:
@@ -77,70 +167,219 @@ class TeamJoined:
             user = get_user_func(user_id)
             if user is None:
                 raise ValueError(f"No user with id {user_id}")
-            self._all_user_emails.add(user.email)
-            self._all_user_ids.add(user.id)
             if user.email_valid:
                 valid_emails.add(user.email)
             return user
 
-        self.light = _get_user(team.light_id)
-        self.middle = _get_user(team.middle_id)
-        self.heavy = _get_user(team.heavy_id)
-        self.alternates = [
-            _get_user(user_id) for user_id in team.get_alternate_ids()
-        ]
+        # maps: slot -> list of user ids
+        slot_user_ids = {slot: [] for slot in TeamMember.SLOTS}
+        for member in get_members_func(team.id):
+            slot_user_ids[member.slot].append(member.user_id)
 
-        self._valid_emails = sorted(valid_emails)
+        def _get_slot_user(slot):
+            user_ids = slot_user_ids[slot]
+            if len(user_ids) == 0:
+                return None
+            return _get_user(user_ids[0])
+
+        self.light = _get_slot_user("light")
+        self.middle = _get_slot_user("middle")
+        self.heavy = _get_slot_user("heavy")
+        self.alternates = tuple(
+            _get_user(user_id)
+            for user_id in sorted(slot_user_ids["alternate"])
+        )
+
+        self._valid_emails = tuple(sorted(valid_emails))
 
     def valid_emails(self):
         return list(self._valid_emails)
 
-    def has_user_id(self, user_id):
-        return user_id in self._all_user_ids
 
-    def has_user_email(self, user_email):
-        return user_email in self._all_user_emails
+# =============================================================================
 
 
-# =============================================================================
+class RosterSnapshot:
+    """An in-memory snapshot of the entire roster at some version.
 
+    The snapshot holds compact copies of the rows rather than ORM
+    objects, and should be treated as immutable since it is shared by
+    all the requests in a server process.
+    """
 
-def get_full_roster(as_json=False):
-    schools = query(School).all()
-    users = query(User).all()
-    teams = query(Team).all()
-    full_roster = {"schools": schools, "users": users, "teams": teams}
+    def __init__(self, version, schools, users, teams, members):
+        self.version = version
+        self.schools = tuple(sorted(schools, key=lambda school: school.name))
+        self.users = tuple(users)
+        self.teams = tuple(
+            sorted(
+                map(TeamJoined.all_users(users, members, self.schools), teams),
+                key=fetch_tms.team_sort_key,
+            )
+        )
 
-    if not as_json:
-        # convert to TeamJoined objects
-        full_roster["teams"] = list(
-            TeamJoined.join_teams(full_roster["teams"])
+        # indexes
+        self.schools_by_name = MappingProxyType(
+            {school.name: school for school in self.schools}
+        )
+        self.users_by_email = MappingProxyType(
+            {user.email: user for user in self.users}
+        )
+        self.teams_by_code = MappingProxyType(
+            {team.school_team_code: team for team in self.teams}
+        )
+        teams_by_school = {}
+        teams_by_division = {}
+        for team in self.teams:
+            teams_by_school.setdefault(team.school.name, []).append(team)
+            teams_by_division.setdefault(team.division, []).append(team)
+        self.teams_by_school = MappingProxyType(
+            {name: tuple(teams) for name, teams in teams_by_school.items()}
+        )
+        self.teams_by_division = MappingProxyType(
+            {
+                division: tuple(teams)
+                for division, teams in teams_by_division.items()
+            }
         )
-        return full_roster
 
-    def model_as_dict(model):
-        return {
-            col: getattr(model, col) for col in model.__table__.columns.keys()
-        }
+    @classmethod
+    def load(cls, version):
+        """Loads a snapshot of the roster from the database.
+
+        Only the columns are selected, so no ORM objects are created and
+        the request's session is not affected.
+        """
+        with db.engine.connect() as connection:
+            schools = {
+                row.id: SchoolRecord(row)
+                for row in connection.execute(
+                    sqlalchemy.select(School.id, School.name)
+                )
+            }
+            users = [
+                UserRecord(row, schools[row.school_id])
+                for row in connection.execute(
+                    sqlalchemy.select(
+                        User.id,
+                        User.first_name,
+                        User.last_name,
+                        User.email,
+                        User.email_valid,
+                        User.role,
+                        User.school_id,
+                    )
+                )
+            ]
+            teams = connection.execute(
+                sqlalchemy.select(
+                    Team.id, Team.school_id, Team.division, Team.number
+                )
+            ).all()
+            members = connection.execute(
+                sqlalchemy.select(
+                    TeamMember.team_id, TeamMember.user_id, TeamMember.slot
+                )
+            ).all()
+        return cls(version, schools.values(), users, teams, members)
+
+
+# The roster snapshot of this server process
+GLOBAL_ROSTER_SNAPSHOT = None
+
+
+def get_roster_snapshot(load=True):
+    """Gets a snapshot of the current roster.
+
+    The snapshot is reused until the roster version in the database
+    changes (see `set_roster()` and `clear_roster()`), so the roster
+    tables are only loaded once per change in each server process.
+
+    Args:
+        load (bool): Whether to load the snapshot if this process
+            doesn't have one for the current version. If False and the
+            snapshot would have to be loaded, None is returned instead.
 
+    Returns:
+        Optional[RosterSnapshot]: The snapshot.
+    """
+    global GLOBAL_ROSTER_SNAPSHOT  # pylint: disable=global-statement
+
+    # get the version first: if the roster changes while loading, the
+    # snapshot will just be loaded again next time
+    version = global_state.get_roster_version()
+    snapshot = GLOBAL_ROSTER_SNAPSHOT
+    if snapshot is None or snapshot.version != version:
+        if not load:
+            return None
+        snapshot = RosterSnapshot.load(version)
+        GLOBAL_ROSTER_SNAPSHOT = snapshot
+    return snapshot
+
+
+# =============================================================================
+
+
+def get_full_roster():
+    snapshot = get_roster_snapshot()
     return {
-        key: list(map(model_as_dict, values))
-        for key, values in full_roster.items()
+        "schools": list(snapshot.schools),
+        "users": list(snapshot.users),
+        "teams": list(snapshot.teams),
     }
 
 
+def iter_full_roster(chunk_size=1000):
+    """Yields the rows of all the roster tables.
+
+    The rows of each table are fetched in batches (with a server-side
+    cursor if the database supports it), so the entire roster is never
+    loaded at once.
+
+    Yields:
+        Tuple[str, Iterator[List[Dict[str, Any]]]]: The key of each
+            table ("schools", "team_members", "teams", and "users"),
+            and an iterator of its rows as dicts, in chunks of at most
+            `chunk_size` rows. Each iterator should be exhausted before
+            going to the next table.
+    """
+
+    def iter_chunks(model):
+        table = model.__table__
+        result = db.session.execute(
+            sqlalchemy.select(table).order_by(*table.primary_key.columns),
+            execution_options={"yield_per": chunk_size},
+        )
+        for rows in result.mappings().partitions():
+            yield [dict(row) for row in rows]
+
+    for key, model in (
+        ("schools", School),
+        ("team_members", TeamMember),
+        ("teams", Team),
+        ("users", User),
+    ):
+        yield key, iter_chunks(model)
+
+
 def clear_roster():
     """Clears the current roster.
 
     Returns:
         bool: Whether the operation was successful.
     """
-    clear_tables(Team, User, School)
+    clear_tables(TeamMember, Team, User, School)
+    global_state.increment_roster_version()
     return True
 
 
 def set_roster(roster):
-    """Clears and sets the current roster.
+    """Sets the current roster.
+
+    Rather than clearing the tables and adding everything again, the
+    given roster is compared against the current tables, and only the
+    rows that changed are inserted, updated, or deleted, all in a single
+    transaction. Rows that didn't change keep their ids.
 
     Assumes the given roster is error-free.
 
@@ -149,13 +388,13 @@ def set_roster(roster):
             `fetch_tms.fetch_roster()`.
 
     Returns:
-        bool: Whether the operation was successful.
+        Union[Tuple[str, None], Tuple[None, Dict[str, Dict[str, int]]]]:
+            A tuple of an error message, or a mapping from "schools",
+            "users", "teams", and "team_members" to the number of rows
+            "inserted", "updated", and "deleted". A team counts as
+            updated if its members changed.
     """
 
-    success = clear_roster()
-    if not success:
-        return False
-
     def school_sort_key(school):
         # alphabetical
         return school
@@ -179,60 +418,192 @@ def set_roster(roster):
     def get_from_roster(key):
         return sorted(roster[key], key=sort_keys[key])
 
+    changes = {
+        key: {"inserted": 0, "updated": 0, "deleted": 0}
+        for key in ("schools", "users", "teams", "team_members")
+    }
+
+    def _delete_missing(key, model, existing, seen_keys):
+        delete_ids = [
+            obj.id
+            for obj_key, obj in existing.items()
+            if obj_key not in seen_keys
+        ]
+        if len(delete_ids) == 0:
+            return
+        query(model).filter(model.id.in_(delete_ids)).delete(
+            synchronize_session=False
+        )
+        changes[key]["deleted"] += len(delete_ids)
+
     try:
-        # create schools in sorted order
-        for school_name in get_from_roster("schools"):
-            school = School(school_name)
-            db.session.add(school)
+        # add new schools in sorted order
+        # maps: school name -> school
+        existing_schools = {school.name: school for school in query(School)}
+        new_schools = [
+            {"name": school_name}
+            for school_name in get_from_roster("schools")
+            if school_name not in existing_schools
+        ]
         # maps: school name -> school id
-        school_ids = {}
-        for school in query(School).all():
-            school_ids[school.name] = school.id
-
-        # create users in school, role, and email order
+        school_ids = {
+            school_name: school.id
+            for school_name, school in existing_schools.items()
+        }
+        school_ids.update(
+            bulk_insert(School, new_schools, School.name, School.id)
+        )
+        changes["schools"]["inserted"] += len(new_schools)
+
+        # add and update users in school, role, and email order
+        # maps: email -> user
+        existing_users = {user.email: user for user in query(User)}
+        new_users = []
+        # maps: email -> role
+        user_roles = {}
         for user_info in get_from_roster("users"):
-            school_id = school_ids[user_info["school"]]
-            user = User(
-                user_info["first_name"],
-                user_info["last_name"],
-                user_info["email"],
-                user_info["role"],
-                school_id,
-                email_valid=user_info.get("email_valid", True),
-            )
-            db.session.add(user)
+            email = user_info["email"]
+            values = {
+                "first_name": user_info["first_name"],
+                "last_name": user_info["last_name"],
+                "role": user_info["role"],
+                "school_id": school_ids[user_info["school"]],
+                "email_valid": user_info.get("email_valid", True),
+            }
+            user_roles[email] = values["role"]
+            user = existing_users.get(email, None)
+            if user is None:
+                new_users.append({"email": email, **values})
+            elif _set(user, commit=False, **values):
+                changes["users"]["updated"] += 1
+        db.session.flush()
+        # maps: email -> user id
+        user_ids = {email: user.id for email, user in existing_users.items()}
+        user_ids.update(bulk_insert(User, new_users, User.email, User.id))
+        changes["users"]["inserted"] += len(new_users)
         # maps: email -> athlete user id
-        athlete_ids = {}
-        for user in query(User, {"role": "ATHLETE"}).all():
-            athlete_ids[user.email] = user.id
-
-        def get_athlete_id(email):
-            if email is None:
-                return None
-            return athlete_ids[email]
+        athlete_ids = {
+            email: user_ids[email]
+            for email, role in user_roles.items()
+            if role == "ATHLETE"
+        }
 
+        # add teams in school, division, and team number order
+        # maps: (school id, division, team number) -> team
+        existing_teams = {
+            (team.school_id, team.division, team.number): team
+            for team in query(Team)
+        }
+        new_teams = []
+        # maps: (school id, division, team number) -> list of
+        #   (athlete user id, slot)
+        team_members = {}
         for team_info in get_from_roster("teams"):
             school_id = school_ids[team_info["school"]]
-            team = Team(
-                school_id,
-                team_info["division"],
-                team_info["number"],
-                get_athlete_id(team_info["light"]),
-                get_athlete_id(team_info["middle"]),
-                get_athlete_id(team_info["heavy"]),
-                [get_athlete_id(email) for email in team_info["alternates"]],
+            team_code = (school_id, team_info["division"], team_info["number"])
+            members = []
+            for slot in TeamMember.SLOTS:
+                if slot == "alternate":
+                    emails = team_info["alternates"]
+                elif team_info[slot] is None:
+                    continue
+                else:
+                    emails = [team_info[slot]]
+                for email in emails:
+                    members.append((athlete_ids[email], slot))
+            team_members[team_code] = members
+            if team_code not in existing_teams:
+                new_teams.append(
+                    {
+                        "school_id": school_id,
+                        "division": team_info["division"],
+                        "number": team_info["number"],
+                    }
+                )
+        # maps: (school id, division, team number) -> team id
+        team_ids = {
+            team_code: team.id for team_code, team in existing_teams.items()
+        }
+        team_ids.update(
+            bulk_insert(
+                Team,
+                new_teams,
+                (Team.school_id, Team.division, Team.number),
+                Team.id,
             )
-            db.session.add(team)
+        )
+        changes["teams"]["inserted"] += len(new_teams)
+
+        # add, update, and delete team members
+        # maps: (team id, user id) -> team member
+        existing_members = {
+            (member.team_id, member.user_id): member
+            for member in query(TeamMember)
+        }
+        new_members = []
+        seen_members = set()
+        changed_team_ids = set()
+        for team_code, members in team_members.items():
+            team_id = team_ids[team_code]
+            for user_id, slot in members:
+                member_key = (team_id, user_id)
+                seen_members.add(member_key)
+                member = existing_members.get(member_key, None)
+                if member is None:
+                    new_members.append(
+                        {"team_id": team_id, "user_id": user_id, "slot": slot}
+                    )
+                elif _set(member, commit=False, slot=slot):
+                    changes["team_members"]["updated"] += 1
+                else:
+                    continue
+                changed_team_ids.add(team_id)
+        deleted_members = [
+            member_key
+            for member_key in existing_members
+            if member_key not in seen_members
+        ]
+        if len(deleted_members) > 0:
+            query(TeamMember).filter(
+                sqlalchemy.tuple_(TeamMember.team_id, TeamMember.user_id).in_(
+                    deleted_members
+                )
+            ).delete(synchronize_session=False)
+            changed_team_ids.update(team_id for team_id, _ in deleted_members)
+        db.session.flush()
+        bulk_insert(TeamMember, new_members)
+        changes["team_members"]["inserted"] += len(new_members)
+        changes["team_members"]["deleted"] += len(deleted_members)
+        # existing teams whose members changed count as updated
+        changes["teams"]["updated"] += sum(
+            1
+            for team_code, team in existing_teams.items()
+            if team_code in team_members and team.id in changed_team_ids
+        )
+
+        # delete the rows that are no longer in the roster, in order of
+        # their dependencies
+        _delete_missing("teams", Team, existing_teams, team_members)
+        _delete_missing("users", User, existing_users, user_roles)
+        _delete_missing(
+            "schools", School, existing_schools, set(roster["schools"])
+        )
     except KeyError:
         # most likely errors are probably:
         # - school not found
         # - team member is not an athlete
         # which will all result in key errors when trying to get the id
         db.session.rollback()
-        return False
+        return "Invalid roster", None
+    except sqlalchemy.exc.SQLAlchemyError as ex:
+        db.session.rollback()
+        print("!", "Database error while setting roster:", ex)
+        return "Database error", None
 
+    if any(sum(counts.values()) > 0 for counts in changes.values()):
+        global_state.increment_roster_version(commit=False)
     db.session.commit()
-    return True
+    return None, changes
 
 
 # =============================================================================
@@ -254,27 +625,56 @@ def is_email_in_roster(email):
     return user is not None
 
 
-def get_users_for_school(school_name, roles):
-    """Gets the emails of the specified roles for the given school."""
+def get_team_ids_for_user(email):
+    """Gets the ids of the teams that the user with the given email is
+    on.
+    """
+    rows = (
+        db.session.query(TeamMember.team_id)
+        .join(User, User.id == TeamMember.user_id)
+        .filter(User.email == email)
+    )
+    return {team_id for (team_id,) in rows}
+
+
+def _get_recipient_roles(roles):
+    """Returns the given roles that can be additional recipients (coaches
+    and spectators), in uppercase.
+    """
     valid_roles = []
     for role in roles:
         role = role.upper()
         if role not in ("COACH", "SPECTATOR"):
             continue
         valid_roles.append(role)
-    if len(valid_roles) == 0:
-        return []
+    return valid_roles
 
-    school = query(School, {"name": school_name}).first()
-    if school is None:
-        raise ValueError(f"School {school_name!r} not found")
-    school_id = school.id
 
-    role_filter = User.role == valid_roles[0]
-    for role in valid_roles[1:]:
-        role_filter = role_filter | (User.role == role)
-    users = query(User).filter(User.school_id == school_id, role_filter).all()
-    return [user.email for user in users]
+def get_users_for_schools(school_names, roles):
+    """Gets the emails of the specified roles for all the given schools
+    in a single query.
+
+    Returns:
+        Dict[str, List[str]]: A mapping from each given school name to
+            the emails of its users with the specified roles. Schools
+            that don't exist or have no such users map to empty lists.
+    """
+    school_names = set(school_names)
+    # maps: school name -> list of emails
+    school_emails = {school_name: [] for school_name in school_names}
+    valid_roles = _get_recipient_roles(roles)
+    if len(valid_roles) == 0 or len(school_names) == 0:
+        return school_emails
+
+    rows = (
+        db.session.query(School.name, User.email)
+        .join(User, User.school_id == School.id)
+        .filter(School.name.in_(school_names), User.role.in_(valid_roles))
+        .order_by(User.id)
+    )
+    for school_name, email in rows:
+        school_emails[school_name].append(email)
+    return school_emails
 
 
 # =============================================================================
@@ -291,18 +691,24 @@ def get_all_divisions():
     return sorted(divisions, key=fetch_tms.division_sort_key)
 
 
-def get_emails_for_division(division):
-    """Gets the set of emails of all the users that belong to teams in
-    the given division.
+def iter_emails_for_division(division, batch_size=1000):
+    """Yields the emails of all the users that belong to teams in the
+    given division, in sorted order.
 
-    If the resulting set is empty, the division did not have any valid
-    emails.
+    The rows are fetched from the database in batches of `batch_size`,
+    so the query results never have to be loaded at once.
     """
-    division_teams = query(Team, {"division": division}).all()
-    emails = set()
-    for team in TeamJoined.join_teams(division_teams):
-        emails.update(team.valid_emails())
-    return emails
+    rows = (
+        db.session.query(User.email)
+        .join(TeamMember, TeamMember.user_id == User.id)
+        .join(Team, Team.id == TeamMember.team_id)
+        .filter(Team.division == division, User.email_valid.is_(True))
+        .distinct()
+        .order_by(User.email)
+        .execution_options(yield_per=batch_size)
+    )
+    for (email,) in rows:
+        yield email
 
 
 # =============================================================================
@@ -317,18 +723,19 @@ def get_all_teams(school=None, division=None):
     The teams are returned in sorted order (by school, division, and
     team number).
     """
-    filters = {}
+    snapshot = get_roster_snapshot()
     if school is not None:
-        school_obj = query(School, {"name": school}).first()
-        if school_obj is None:
+        if school not in snapshot.schools_by_name:
             # school doesn't exist
             raise ValueError(f"School {school!r} not found")
-        filters["school_id"] = school_obj.id
-    if division is not None:
-        filters["division"] = division
-    if len(filters) == 0:
-        filters = None
-    return TeamJoined.join_teams(query(Team, filters).all(), sort=True)
+        teams = snapshot.teams_by_school.get(school, ())
+        if division is not None:
+            teams = [team for team in teams if team.division == division]
+    elif division is not None:
+        teams = snapshot.teams_by_division.get(division, ())
+    else:
+        teams = snapshot.teams
+    return list(teams)
 
 
 def get_team(school, division, team_number):
@@ -360,6 +767,10 @@ def get_team(school, division, team_number):
 def get_teams(team_infos):
     """Gets the team objects for the given teams.
 
+    If this server process has a roster snapshot for the current version,
+    the teams are taken from it. Otherwise, only the requested teams and
+    their members are fetched, rather than loading the entire roster.
+
     Args:
         team_infos (List[Tuple[str, str, int]]): A list of the school
             team codes, as tuples (school, division, team number).
@@ -374,35 +785,65 @@ def get_teams(team_infos):
     """
     if len(team_infos) == 0:
         return {}
-    if len(team_infos) == 1:
-        team_info = team_infos[0]
-        return {team_info: get_team(*team_info)}
-
-    # get all the teams to reduce the number of database queries
-    school_ids = {school.name: school.id for school in query(School).all()}
-    teams = {
-        (team.school_id, team.division, team.number): team
-        for team in query(Team).all()
-    }
 
-    team_joiner = TeamJoined.all_users()
+    snapshot = get_roster_snapshot(load=False)
+    if snapshot is not None:
+        schools_by_name = snapshot.schools_by_name
+        teams_by_code = snapshot.teams_by_code
+    else:
+        # only fetch the requested teams rather than loading the whole
+        # roster for a few teams
+        school_names = {school_name for school_name, _, _ in team_infos}
+        schools = query(School).filter(School.name.in_(school_names)).all()
+        schools_by_name = {school.name: school for school in schools}
+        school_ids = {school.name: school.id for school in schools}
+        team_codes = {
+            (school_ids[school_name], division, team_number)
+            for school_name, division, team_number in team_infos
+            if school_name in school_ids
+        }
+        teams = []
+        if len(team_codes) > 0:
+            teams = (
+                query(Team)
+                .filter(
+                    columns_in(
+                        (Team.school_id, Team.division, Team.number),
+                        team_codes,
+                    )
+                )
+                .all()
+            )
+        team_ids = [team.id for team in teams]
+        members = []
+        users = []
+        if len(team_ids) > 0:
+            members = (
+                query(TeamMember)
+                .filter(TeamMember.team_id.in_(team_ids))
+                .all()
+            )
+            user_ids = {member.user_id for member in members}
+            users = query(User).filter(User.id.in_(user_ids)).all()
+        team_joiner = TeamJoined.all_users(users, members, schools)
+        teams_by_code = {}
+        for team in map(team_joiner, teams):
+            teams_by_code[team.school_team_code] = team
 
     results = {}
     for school_team_code in team_infos:
         if school_team_code in results:
             # already processed
             continue
-        school_name, division, team_number = school_team_code
-        school_id = school_ids.get(school_name, None)
-        if school_id is None:
+        school_name = school_team_code[0]
+        if school_name not in schools_by_name:
             results[school_team_code] = (
                 f"School {school_name!r} not found",
                 None,
             )
             continue
-        school_id_team_code = (school_id, division, team_number)
-        team_obj = teams.get(school_id_team_code, None)
-        if team_obj is None:
+        team = teams_by_code.get(school_team_code, None)
+        if team is None:
             team_code_str = fetch_tms.school_team_code_to_str(
                 *school_team_code
             )
@@ -411,5 +852,5 @@ def get_teams(team_infos):
                 None,
             )
             continue
-        results[school_team_code] = (None, team_joiner(team_obj))
+        results[school_team_code] = (None, team)
     return results
@@ -4,9 +4,26 @@ Helper methods for the EmailSent and BlastEmailSent tables.
 
 # =============================================================================
 
+from datetime import datetime
+
+import sqlalchemy
+
 import utils
 from db._utils import clear_tables, query
-from db.models import BlastEmailSent, EmailSent, db
+from db.models import (
+    BlastEmailSent,
+    EmailRecipient,
+    EmailSent,
+    School,
+    User,
+    db,
+)
+
+# =============================================================================
+
+# The default and maximum number of sent emails on each page
+SENT_EMAILS_PAGE_SIZE = 50
+MAX_SENT_EMAILS_PAGE_SIZE = 200
 
 # =============================================================================
 
@@ -17,7 +34,7 @@ def clear_sent_emails():
     Returns:
         bool: Whether the operation was successful.
     """
-    clear_tables(EmailSent, BlastEmailSent)
+    clear_tables(EmailRecipient, EmailSent, BlastEmailSent)
     return True
 
 
@@ -57,47 +74,259 @@ def add_blast_emails_sent(emails_sent):
 # =============================================================================
 
 
-def get_all_sent_emails(tz=utils.EASTERN_TZ):
-    """Returns all the sent emails, sorted by time sent (most recent
-    first).
+def _null_like(column):
+    # the null needs an explicit type for Postgres to match it up with the
+    # column in the other part of the union
+    return sqlalchemy.cast(sqlalchemy.null(), column.type).label(column.key)
+
+
+def _sent_emails_select(model, is_blast, cursor, limit):
+    """Returns a select of the sent emails of the given model, sorted by
+    time sent (most recent first), that come after the given cursor.
+    """
+    if is_blast:
+        columns = (
+            _null_like(EmailSent.match_number),
+            model.division,
+            model.tag,
+        )
+    else:
+        columns = (
+            model.match_number,
+            _null_like(BlastEmailSent.division),
+            _null_like(BlastEmailSent.tag),
+        )
+    select = sqlalchemy.select(
+        model.id,
+        sqlalchemy.literal(int(is_blast)).label("blast"),
+        model.time_sent,
+        model.template_name,
+        model.subject,
+        *columns,
+    )
+    if cursor is not None:
+        # the full sort key is `(time_sent, blast, id)`, but `blast` is
+        # constant within a table, so only compare against the parts of
+        # the key that this table's index covers
+        time_sent, cursor_blast, cursor_id = cursor
+        if int(is_blast) < cursor_blast:
+            select = select.where(model.time_sent <= time_sent)
+        elif int(is_blast) > cursor_blast:
+            select = select.where(model.time_sent < time_sent)
+        else:
+            select = select.where(
+                sqlalchemy.tuple_(model.time_sent, model.id)
+                < (time_sent, cursor_id)
+            )
+    return select.order_by(model.time_sent.desc(), model.id.desc()).limit(
+        limit
+    )
+
+
+def _query_sent_emails(cursor, limit):
+    """Queries the match and blast emails in a single sorted list, most
+    recent first.
+    """
+    # each table is limited and sorted separately so that each one can
+    # use its time sent index, before being merged
+    union = sqlalchemy.union_all(
+        *(
+            sqlalchemy.select(
+                _sent_emails_select(model, is_blast, cursor, limit).subquery()
+            )
+            for model, is_blast in (
+                (EmailSent, False),
+                (BlastEmailSent, True),
+            )
+        )
+    ).subquery()
+    select = (
+        sqlalchemy.select(union)
+        .order_by(
+            union.c.time_sent.desc(), union.c.blast.desc(), union.c.id.desc()
+        )
+        .limit(limit)
+    )
+    return db.session.execute(select).all()
+
+
+def _format_sent_emails(rows, tz):
+    recipients = get_recipients(row.id for row in rows if not row.blast)
+    emails_sent = []
+    for row in rows:
+        email_sent = {
+            "id": row.id,
+            "template_name": row.template_name,
+            "subject": row.subject,
+            "time_sent": utils.dt_str(utils.dt_to_timezone(row.time_sent, tz)),
+            "blast": bool(row.blast),
+        }
+        if row.blast:
+            email_sent["recipients"] = BlastEmailSent.recipient_str(
+                row.division, row.tag
+            )
+        else:
+            email_sent["match_number"] = row.match_number
+            email_sent["recipients"] = recipients.get(row.id, [])
+        emails_sent.append(email_sent)
+    return emails_sent
+
+
+def _cursor_to_str(row):
+    return f"{row.time_sent.isoformat()}_{int(row.blast)}_{row.id}"
+
+
+def _parse_cursor(cursor_str):
+    try:
+        time_sent_str, blast_str, id_str = cursor_str.split("_")
+        time_sent = datetime.fromisoformat(time_sent_str)
+        blast = int(blast_str)
+        email_sent_id = int(id_str)
+    except ValueError:
+        return None
+    if blast not in (0, 1):
+        return None
+    return time_sent, blast, email_sent_id
+
+
+def get_sent_emails_page(
+    cursor=None, page_size=SENT_EMAILS_PAGE_SIZE, tz=utils.EASTERN_TZ
+):
+    """Returns a page of the sent emails, sorted by time sent (most
+    recent first).
+
+    Args:
+        cursor (Optional[str]): The cursor returned with the previous
+            page, or None for the first page.
+        page_size (int): The maximum number of sent emails to return.
+            Sizes above `MAX_SENT_EMAILS_PAGE_SIZE` are lowered to it.
+        tz: The timezone to show the times sent in.
+
+    Returns:
+        Union[Tuple[str, None], Tuple[None, Dict]]:
+            An error message, or the page in the format:
+                'sent_emails': the sent emails, in the format:
+                    'id': the id of the sent email (unique with 'blast')
+                    'template_name': the Mailchimp template used
+                    'subject': the email subject
+                    'time_sent': when the email was sent (as a string)
+                    'blast': whether the email was a blast email
+                    'match_number': if not a blast email, the match
+                        number
+                    'recipients':
+                        if a blast email, a string describing the
+                        recipients
+                        otherwise, a list of recipient emails
+                'next_cursor': the cursor for the next page, or None if
+                    this is the last page
+    """
+    if cursor is not None:
+        cursor_str = cursor
+        cursor = _parse_cursor(cursor_str)
+        if cursor is None:
+            return f"Invalid cursor: {cursor_str!r}", None
+    if page_size < 1:
+        return "Page size must be positive", None
+    page_size = min(page_size, MAX_SENT_EMAILS_PAGE_SIZE)
+
+    # fetch one extra row to know whether there is a next page
+    rows = _query_sent_emails(cursor, page_size + 1)
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = _cursor_to_str(rows[-1])
+
+    return None, {
+        "sent_emails": _format_sent_emails(rows, tz),
+        "next_cursor": next_cursor,
+    }
+
+
+# =============================================================================
+
+
+def get_recipients(email_sent_ids):
+    """Gets the recipients of the given sent emails.
+
+    Returns:
+        Dict[int, List[str]]: A mapping from the ids of the given sent
+            emails to their sorted recipient emails. Ids that don't
+            exist are not included.
+    """
+    email_sent_ids = set(email_sent_ids)
+    if len(email_sent_ids) == 0:
+        return {}
+    recipients = {}
+    for email_sent_id, email in (
+        db.session.query(EmailRecipient.email_sent_id, EmailRecipient.email)
+        .filter(EmailRecipient.email_sent_id.in_(email_sent_ids))
+        .order_by(EmailRecipient.email_sent_id, EmailRecipient.email)
+    ):
+        recipients.setdefault(email_sent_id, []).append(email)
+    return recipients
+
+
+def get_emails_sent_to(email, tz=utils.EASTERN_TZ):
+    """Returns the match emails sent to the given email, sorted by time
+    sent (most recent first).
 
     Returns:
         List[Dict]: The sent emails in the format:
+            'id': the id of the sent email
+            'match_number': the match number
             'template_name': the Mailchimp template used
             'subject': the email subject
             'time_sent': when the email was sent (as a string)
-            'blast': whether the email was a blast email
-            'match_number': if not a blast email, the match number
-            'recipients':
-                if a blast email, a string describing the recipients
-                otherwise, a list of recipient emails
     """
+    emails_sent = (
+        query(EmailSent)
+        .join(EmailRecipient, EmailRecipient.email_sent_id == EmailSent.id)
+        .filter(EmailRecipient.email == email)
+        .order_by(EmailSent.time_sent.desc(), EmailSent.id.desc())
+    )
+    return [
+        {
+            "id": email_sent.id,
+            "match_number": email_sent.match_number,
+            "template_name": email_sent.template_name,
+            "subject": email_sent.subject,
+            "time_sent": utils.dt_str(
+                utils.dt_to_timezone(email_sent.time_sent, tz)
+            ),
+        }
+        for email_sent in emails_sent
+    ]
 
-    emails_sent = []
-    for email_sent in query(EmailSent).all():
-        emails_sent.append(
-            {
-                "template_name": email_sent.template_name,
-                "subject": email_sent.subject,
-                "time_sent": utils.dt_str(
-                    utils.dt_to_timezone(email_sent.time_sent, tz)
-                ),
-                "blast": False,
-                "match_number": email_sent.match_number,
-                "recipients": email_sent.email_recipients(),
-            }
-        )
-    for email_sent in query(BlastEmailSent).all():
-        emails_sent.append(
-            {
-                "template_name": email_sent.template_name,
-                "subject": email_sent.subject,
-                "time_sent": utils.dt_str(
-                    utils.dt_to_timezone(email_sent.time_sent, tz)
-                ),
-                "blast": True,
-                "recipients": email_sent.recipient,
-            }
-        )
 
-    return sorted(emails_sent, key=lambda e: e["time_sent"], reverse=True)
+def count_emails_sent_by_school(school_names=None):
+    """Counts the number of match emails sent to each school.
+
+    An email counts towards a school if any of its recipients is a user
+    of that school in the current roster.
+
+    Args:
+        school_names (Optional[Iterable[str]]): If given, only these
+            schools are counted.
+
+    Returns:
+        Dict[str, int]: A mapping from school names to the number of
+            emails sent to them. Schools with no emails are not
+            included.
+    """
+    rows = (
+        db.session.query(
+            School.name,
+            sqlalchemy.func.count(
+                sqlalchemy.distinct(EmailRecipient.email_sent_id)
+            ),
+        )
+        .join(User, User.school_id == School.id)
+        .join(EmailRecipient, EmailRecipient.email == User.email)
+        .group_by(School.name)
+    )
+    if school_names is not None:
+        school_names = set(school_names)
+        if len(school_names) == 0:
+            return {}
+        rows = rows.filter(School.name.in_(school_names))
+    return dict(rows.all())
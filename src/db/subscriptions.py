@@ -4,7 +4,7 @@ Helper methods for the UserSubscriptions table.
 
 # =============================================================================
 
-from db._utils import clear_tables, query
+from db._utils import clear_tables, columns_in, query
 from db.models import UserSubscription, db
 
 # =============================================================================
@@ -27,14 +27,24 @@ def get_all_subscribers(school_team_codes):
     teams_subscribers = {
         school_team_code: set() for school_team_code in school_team_codes
     }
-    for subscription in query(UserSubscription).all():
+    if len(teams_subscribers) == 0:
+        return teams_subscribers
+    subscriptions = query(UserSubscription).filter(
+        columns_in(
+            (
+                UserSubscription.school,
+                UserSubscription.division,
+                UserSubscription.number,
+            ),
+            teams_subscribers.keys(),
+        )
+    )
+    for subscription in subscriptions:
         school_team_code = (
             subscription.school,
             subscription.division,
             subscription.number,
         )
-        if school_team_code not in teams_subscribers:
-            continue
         teams_subscribers[school_team_code].add(subscription.email)
     return teams_subscribers
 
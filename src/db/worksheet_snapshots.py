@@ -0,0 +1,221 @@
+"""
+Helper methods for the WorksheetSnapshots table.
+"""
+
+# =============================================================================
+
+import json
+from datetime import datetime
+
+import sqlalchemy
+import sqlalchemy.exc
+
+import utils
+from db._utils import clear_tables, query
+from db.models import WorksheetSnapshot, db
+
+# =============================================================================
+
+# The maximum number of seconds to wait for another server process that
+# is fetching the same worksheet (only enforced with Postgres)
+LOCK_TIMEOUT = 10
+
+# =============================================================================
+
+
+def _lock_snapshot(connection, spreadsheet_id, worksheet_name):
+    """Locks the snapshot row of the given worksheet (creating it if
+    needed) until the end of the connection's transaction, waiting for
+    at most `LOCK_TIMEOUT` seconds.
+
+    Returns:
+        sqlalchemy.engine.Row: The snapshot row.
+
+    Raises:
+        sqlalchemy.exc.OperationalError: If the lock could not be taken
+            in time.
+    """
+    table = WorksheetSnapshot.__table__
+    key_filter = sqlalchemy.and_(
+        table.c.spreadsheet_id == spreadsheet_id,
+        table.c.worksheet_name == worksheet_name,
+    )
+    select = sqlalchemy.select(table).where(key_filter)
+
+    if connection.execute(select).first() is None:
+        try:
+            connection.execute(
+                table.insert().values(
+                    spreadsheet_id=spreadsheet_id,
+                    worksheet_name=worksheet_name,
+                )
+            )
+            connection.commit()
+        except sqlalchemy.exc.IntegrityError:
+            # another process created it at the same time
+            connection.rollback()
+    else:
+        connection.commit()
+
+    if connection.dialect.name == "postgresql":
+        # only applies to the current transaction
+        connection.exec_driver_sql(
+            f"SET LOCAL lock_timeout = {int(LOCK_TIMEOUT * 1000)}"
+        )
+    return connection.execute(select.with_for_update()).one()
+
+
+def get_or_fetch(
+    spreadsheet_id,
+    worksheet_name,
+    ttl,
+    fetch_func,
+    fingerprint_func=None,
+    force=False,
+):
+    """Gets the snapshot of the given worksheet if it was fetched in the
+    last `ttl` seconds. Otherwise, fetches and saves a new snapshot.
+
+    If a fingerprint function is given, a stale snapshot is first checked
+    against the current fingerprint of the spreadsheet, and is reused
+    without fetching the worksheet again if it is unchanged.
+
+    The snapshot row is locked while it is being checked and fetched, so
+    concurrent callers (even in other server processes) will wait for a
+    single fetch rather than each fetching the worksheet themselves. The
+    lock is held on a separate connection, so the current session is not
+    committed, and callers that can't get the lock within
+    `LOCK_TIMEOUT` seconds fetch the worksheet themselves instead.
+
+    Args:
+        spreadsheet_id (str): The id of the spreadsheet.
+        worksheet_name (str): The name of the worksheet.
+        ttl (float): The number of seconds a snapshot is valid for. If
+            falsy, the cache is not used.
+        fetch_func (Callable[[], Union[Tuple[str, None], Tuple[None, Any]]]):
+            A function that fetches the worksheet and returns an error
+            message or the JSON-serializable data to save.
+        fingerprint_func (Optional[Callable[[], Optional[str]]]):
+            A function that returns the current fingerprint of the
+            spreadsheet, or None if it could not be fetched.
+        force (bool): Whether to always fetch and save a new snapshot,
+            such as when the values were already fetched.
+
+    Returns:
+        Union[
+            Tuple[str, None, None, None],
+            Tuple[None, Any, datetime, Optional[str]]
+        ]:
+            A tuple of an error message, or the data, the time it was
+            fetched, and the fingerprint of the spreadsheet it was
+            fetched from (None if not known).
+    """
+    if fingerprint_func is None:
+
+        def fingerprint_func():
+            return None
+
+    def fetch_directly():
+        time_fetched = datetime.utcnow()
+        error_msg, data = fetch_func()
+        if error_msg is not None:
+            return error_msg, None, None, None
+        return None, data, time_fetched, None
+
+    if not ttl:
+        # the values are always fetched, so don't bother with the
+        # fingerprint
+        return fetch_directly()
+
+    table = WorksheetSnapshot.__table__
+    key_filter = sqlalchemy.and_(
+        table.c.spreadsheet_id == spreadsheet_id,
+        table.c.worksheet_name == worksheet_name,
+    )
+
+    with db.engine.connect() as connection:
+        try:
+            snapshot = _lock_snapshot(
+                connection, spreadsheet_id, worksheet_name
+            )
+        except sqlalchemy.exc.OperationalError as ex:
+            connection.rollback()
+            print(
+                " ",
+                f"Could not lock the snapshot of {worksheet_name!r}",
+                f"({type(ex.orig).__name__}); fetching it directly",
+            )
+            return fetch_directly()
+        now = datetime.utcnow()
+
+        def save_snapshot(**values):
+            connection.execute(
+                table.update().where(key_filter).values(**values)
+            )
+
+        def use_snapshot():
+            data = json.loads(snapshot.data)
+            # release the lock
+            connection.commit()
+            return None, data, snapshot.time_fetched, snapshot.fingerprint
+
+        if not force and snapshot.time_fetched is not None:
+            if (now - snapshot.time_fetched).total_seconds() < ttl:
+                return use_snapshot()
+
+        # the fingerprint is fetched before the values so that any edits
+        # in between cause a mismatch on the next check
+        fingerprint = fingerprint_func()
+        if (
+            not force
+            and snapshot.data is not None
+            and fingerprint is not None
+            and fingerprint == snapshot.fingerprint
+        ):
+            # unchanged, so no need to fetch the values again
+            save_snapshot(time_fetched=now)
+            data = json.loads(snapshot.data)
+            connection.commit()
+            return None, data, now, fingerprint
+
+        error_msg, data = fetch_func()
+        if error_msg is not None:
+            connection.rollback()
+            return error_msg, None, None, None
+        save_snapshot(
+            data=utils.json_dump_compact(data),
+            time_fetched=now,
+            fingerprint=fingerprint,
+        )
+        connection.commit()
+        return None, data, now, fingerprint
+
+
+# =============================================================================
+
+
+def invalidate(spreadsheet_id, worksheet_name=None):
+    """Invalidates the snapshots of the given spreadsheet, or only the
+    given worksheet if given.
+
+    Returns:
+        bool: Whether the operation was successful.
+    """
+    filters = {"spreadsheet_id": spreadsheet_id}
+    if worksheet_name is not None:
+        filters["worksheet_name"] = worksheet_name
+    query(WorksheetSnapshot, filters).update(
+        {"data": None, "time_fetched": None, "fingerprint": None}
+    )
+    db.session.commit()
+    return True
+
+
+def clear_snapshots():
+    """Clears all the worksheet snapshots.
+
+    Returns:
+        bool: Whether the operation was successful.
+    """
+    clear_tables(WorksheetSnapshot)
+    return True
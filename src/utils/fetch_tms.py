@@ -4,15 +4,20 @@ Fetches information from the TMS spreadsheet.
 
 # =============================================================================
 
+import copy
+import hashlib
 import re
-from functools import partial
+import string
+from functools import lru_cache, partial
 
 import google.auth.exceptions
 import gspread
 import requests.exceptions
+from flask import current_app
 
 import db
-from utils import list_of_items
+import utils
+from utils import list_of_items, sheets_rate_limit
 
 # =============================================================================
 
@@ -72,10 +77,24 @@ MATCHES_HEADERS = [
     "clean red team",
 ]
 
+# The number of rows at the top of the matches worksheet to look for the
+# header row in before searching the entire worksheet.
+MATCHES_HEADER_SEARCH_ROWS = 50
+
+# The position of the header row found in the last fetch of the matches
+# worksheet, as a tuple of the index of the header row and a mapping from
+# each header to its column index. Since the worksheet is only fetched
+# when its fingerprint changes, this is checked once per new version.
+GLOBAL_MATCHES_HEADER_POSITION = None
+
 SCHOOL_TEAM_CODE_PATTERN = re.compile(
     rf"(?P<school>[A-Za-z ]+) {TEAM_CODE_PATTERN.pattern}"
 )
 
+# The maximum number of distinct team names (and team codes) to remember
+# the parsed values of.
+TEAM_NAME_PARSE_CACHE_SIZE = 2048
+
 # same order as the communications view (2023-03-19)
 MATCH_NUMBER_HUNDREDS_ORDER = [9, 7, 8, 1, 5, 2, 6, 4, 3]
 
@@ -112,6 +131,53 @@ def id_to_url(spreadsheet_id):
     return gspread.spreadsheet.SPREADSHEET_DRIVE_URL % spreadsheet_id
 
 
+# The Drive API endpoint for file metadata (used to check whether the
+# spreadsheet changed)
+DRIVE_FILES_URL = gspread.urls.DRIVE_FILES_API_V3_URL
+
+# =============================================================================
+
+# The errors raised when a cached connection was closed, such as:
+# (
+#   "Connection aborted.",
+#   RemoteDisconnected("Remote end closed connection without response"),
+# )
+CONNECTION_ERRORS = (
+    google.auth.exceptions.TransportError,
+    requests.exceptions.ConnectionError,
+)
+
+# The number of times a cached connection was stale and had to be
+# reconnected (in this process)
+RECONNECT_COUNT = 0
+
+
+def _record_reconnect(description, ex):
+    global RECONNECT_COUNT  # pylint: disable=global-statement
+
+    RECONNECT_COUNT += 1
+    print("!", f"{description} connection aborted:", ex)
+    print("!", f"Reconnecting... (reconnect #{RECONNECT_COUNT})")
+
+
+def get_connection_stats():
+    """Returns stats about the connection to the TMS spreadsheet in this
+    process.
+
+    Returns:
+        Dict[str, int]: The stats in the format:
+            'reconnects': the number of times a cached connection was
+                stale and had to be reconnected
+            'throttled': the number of requests that had to wait for the
+                rate limit
+            'retried': the number of requests that were retried after
+                being rate limited by Google
+            'gave_up': the number of rate limited requests that were not
+                retried because the wait would have been too long
+    """
+    return {"reconnects": RECONNECT_COUNT, **sheets_rate_limit.get_stats()}
+
+
 # =============================================================================
 
 GLOBAL_SERVICE_ACCOUNT = None
@@ -147,33 +213,16 @@ def get_service_account_client(
             and email == GLOBAL_SERVICE_ACCOUNT.auth.service_account_email
         ):
             # assume same service account
-            # check that connection is still valid
-            try:
-                _ = GLOBAL_SERVICE_ACCOUNT.list_spreadsheet_files()
-                return None, GLOBAL_SERVICE_ACCOUNT
-            except (
-                google.auth.exceptions.TransportError,
-                requests.exceptions.ConnectionError,
-            ) as ex:
-                # error is: (
-                #   "Connection aborted.",
-                #   RemoteDisconnected(
-                #     "Remote end closed connection without response"
-                #   ),
-                # )
-                print("!", "Client connection aborted:", ex)
-            # refetch the client
-            print("!", "Refetching...")
-            return get_service_account_client(
-                service_account_info=service_account_info,
-                invalid_prefix=invalid_prefix,
-                force=True,
-            )
+            # don't check that the connection is still valid; the actual
+            # calls will reconnect if needed (see `call_with_spreadsheet()`)
+            return None, GLOBAL_SERVICE_ACCOUNT
 
     # get client
     try:
         client = gspread.service_account_from_dict(
-            service_account_info, scopes=gspread.auth.READONLY_SCOPES
+            service_account_info,
+            scopes=gspread.auth.READONLY_SCOPES,
+            client_factory=sheets_rate_limit.ThrottledClient,
         )
     except google.auth.exceptions.MalformedError as ex:
         # if the service account is invalid, reset the spreadsheet
@@ -227,30 +276,19 @@ def get_tms_spreadsheet(spreadsheet_id=None, force=False):
     # check cached spreadsheet
     if not force and GLOBAL_TMS_SPREADSHEET is not None:
         if GLOBAL_TMS_SPREADSHEET.id == spreadsheet_id:
-            # check that connection is still valid
-            try:
-                _ = GLOBAL_TMS_SPREADSHEET.sheet1
-                return None, GLOBAL_TMS_SPREADSHEET
-            except (
-                google.auth.exceptions.TransportError,
-                requests.exceptions.ConnectionError,
-            ) as ex:
-                # error is: (
-                #   "Connection aborted.",
-                #   RemoteDisconnected(
-                #     "Remote end closed connection without response"
-                #   ),
-                # )
-                print("!", "Spreadsheet connection aborted:", ex)
-            # refetch the client and spreadsheet
-            print("!", "Refetching...")
-            return get_tms_spreadsheet(
-                spreadsheet_id=spreadsheet_id, force=True
-            )
+            # don't check that the connection is still valid; the actual
+            # calls will reconnect if needed (see `call_with_spreadsheet()`)
+            return None, GLOBAL_TMS_SPREADSHEET
 
     # get spreadsheet
     try:
         spreadsheet = client.open_by_key(spreadsheet_id)
+    except CONNECTION_ERRORS as ex:
+        if force:
+            raise
+        # the cached client is stale
+        _record_reconnect("Client", ex)
+        return get_tms_spreadsheet(spreadsheet_id=spreadsheet_id, force=True)
     except gspread.SpreadsheetNotFound:
         GLOBAL_TMS_SPREADSHEET = None
         if from_db:
@@ -280,6 +318,37 @@ def get_tms_spreadsheet(spreadsheet_id=None, force=False):
     return None, spreadsheet
 
 
+def call_with_spreadsheet(func):
+    """Calls the given function with the TMS spreadsheet.
+
+    The cached spreadsheet connection is assumed to still be valid. If
+    the call fails with a connection error, the client and spreadsheet
+    are refetched and the call is retried once.
+
+    Args:
+        func (Callable[
+            [gspread.Spreadsheet], Union[Tuple[str, None], Tuple[None, Any]]
+        ]):
+            The function to call, which should return an error message
+            or a result.
+
+    Returns:
+        Union[Tuple[str, None], Tuple[None, Any]]:
+            A tuple of an error message, or the result of the function.
+    """
+    error_msg, spreadsheet = get_tms_spreadsheet()
+    if error_msg is not None:
+        return error_msg, None
+    try:
+        return func(spreadsheet)
+    except CONNECTION_ERRORS as ex:
+        _record_reconnect("Spreadsheet", ex)
+    error_msg, spreadsheet = get_tms_spreadsheet(force=True)
+    if error_msg is not None:
+        return error_msg, None
+    return func(spreadsheet)
+
+
 def get_worksheet(spreadsheet, worksheet_name, description=None):
     """Gets the specified worksheet from the given spreadsheet.
 
@@ -296,6 +365,156 @@ def get_worksheet(spreadsheet, worksheet_name, description=None):
     return None, worksheet
 
 
+def _fetch_spreadsheet_fingerprint(spreadsheet):
+    """Fetches a fingerprint of the current version of the given
+    spreadsheet from its Drive metadata, which changes whenever the
+    spreadsheet is edited.
+
+    Returns:
+        Union[Tuple[str, None], Tuple[None, str]]:
+            A tuple of an error message, or the fingerprint.
+    """
+    try:
+        response = spreadsheet.client.request(
+            "get",
+            f"{DRIVE_FILES_URL}/{spreadsheet.id}",
+            params={
+                "fields": "version,modifiedTime",
+                "supportsAllDrives": True,
+            },
+        )
+        metadata = response.json()
+        return None, f'{metadata["version"]}@{metadata["modifiedTime"]}'
+    except (gspread.exceptions.APIError, ValueError, KeyError) as ex:
+        return f"Could not fetch spreadsheet metadata: {ex}", None
+
+
+def get_worksheet_snapshot(
+    worksheet_name, read_func, description=None, prefetched=None
+):
+    """Gets the values of the specified worksheet from the TMS
+    spreadsheet.
+
+    The values are cached in a snapshot shared by all the server
+    processes, so the worksheet is only actually fetched if the snapshot
+    is older than the `TMS_SNAPSHOT_TTL` config value (in seconds) and
+    the spreadsheet was edited since the snapshot was fetched (according
+    to its Drive metadata).
+
+    Args:
+        worksheet_name (str): The name of the worksheet.
+        read_func (Callable[
+            [gspread.Worksheet], Union[Tuple[str, None], Tuple[None, Any]]
+        ]):
+            A function that reads the values from the worksheet and
+            returns an error message or the JSON-serializable values.
+        description (Optional[str]): A description of the worksheet for
+            error messages.
+        prefetched (Optional[Tuple[Any, Optional[str]]]): The values
+            and the spreadsheet fingerprint, if they were already
+            fetched (such as by `fetch_roster()`). They replace the
+            saved snapshot.
+
+    Returns:
+        Union[
+            Tuple[str, None, None, None],
+            Tuple[None, Any, datetime, str]
+        ]:
+            A tuple of an error message, or the values, the time they
+            were fetched, and a fingerprint of the values (which is the
+            same if and only if the values are the same).
+    """
+    spreadsheet_id = db.global_state.get_tms_spreadsheet_id()
+    if spreadsheet_id is None:
+        return "No TMS spreadsheet in database", None, None, None
+
+    def read_worksheet(spreadsheet):
+        error_msg, worksheet = get_worksheet(
+            spreadsheet, worksheet_name, description=description
+        )
+        if error_msg is not None:
+            return error_msg, None
+        return read_func(worksheet)
+
+    def fetch_fingerprint():
+        error_msg, fingerprint = call_with_spreadsheet(
+            _fetch_spreadsheet_fingerprint
+        )
+        if error_msg is not None:
+            # not a fatal error; just fetch the values
+            print("!", error_msg)
+        return fingerprint
+
+    if prefetched is None:
+        fetch_func = partial(call_with_spreadsheet, read_worksheet)
+        fingerprint_func = fetch_fingerprint
+    else:
+        prefetched_values, prefetched_fingerprint = prefetched
+
+        def fetch_func():
+            return None, prefetched_values
+
+        def fingerprint_func():
+            return prefetched_fingerprint
+
+    (
+        error_msg,
+        values,
+        time_fetched,
+        fingerprint,
+    ) = db.worksheet_snapshots.get_or_fetch(
+        spreadsheet_id,
+        worksheet_name,
+        current_app.config.get("TMS_SNAPSHOT_TTL", None),
+        fetch_func,
+        fingerprint_func,
+        force=prefetched is not None,
+    )
+    if error_msg is not None:
+        return error_msg, None, None, None
+    if fingerprint is None:
+        # fall back to a hash of the values
+        values_hash = hashlib.sha1(
+            utils.json_dump_compact(values).encode("utf-8")
+        ).hexdigest()
+        fingerprint = f"sha1:{values_hash}"
+    return None, values, time_fetched, f"{spreadsheet_id}:{fingerprint}"
+
+
+# maps: worksheet name -> (fingerprint, parsed result)
+_PARSED_WORKSHEETS = {}
+
+
+def parse_with_cache(
+    worksheet_name, fingerprint, parse_func, copy_result=False
+):
+    """Parses the values of the given worksheet, reusing the last parsed
+    result for the worksheet if the fingerprint of its values is the
+    same.
+
+    Args:
+        worksheet_name (str): The name of the worksheet.
+        fingerprint (str): The fingerprint of the worksheet values, as
+            returned by `get_worksheet_snapshot()`.
+        parse_func (Callable[[], Any]): A function that parses the
+            worksheet values.
+        copy_result (bool): Whether to return a deep copy of the result,
+            for callers that will modify it.
+
+    Returns:
+        Any: The parsed result.
+    """
+    cached = _PARSED_WORKSHEETS.get(worksheet_name, None)
+    if cached is not None and cached[0] == fingerprint:
+        result = cached[1]
+    else:
+        result = parse_func()
+        _PARSED_WORKSHEETS[worksheet_name] = (fingerprint, result)
+    if copy_result:
+        return copy.deepcopy(result)
+    return result
+
+
 # =============================================================================
 
 
@@ -336,11 +555,134 @@ def team_sort_key(team):
     return school_team_code_sort_key(team.school_team_code)
 
 
-def fetch_roster():
+def _columns_to_rows(columns):
+    """Converts values fetched in columns to rows, filling in the missing
+    trailing values like `gspread.Worksheet.get_values()`.
+    """
+    num_rows = max((len(column) for column in columns), default=0)
+    return [
+        [column[i] if i < len(column) else "" for column in columns]
+        for i in range(num_rows)
+    ]
+
+
+def _values_batch_get(spreadsheet, ranges):
+    """Fetches the values of the given ranges in a single request.
+
+    Args:
+        spreadsheet (gspread.Spreadsheet): The spreadsheet.
+        ranges (List[Tuple[str, Optional[str]]]): The worksheet name and
+            range in A1 notation of each range to fetch. If the range is
+            None, the entire worksheet is fetched.
+
+    Returns:
+        List[List[List[str]]]: The fetched values of each range, in
+            columns.
+
+    Raises:
+        gspread.exceptions.APIError: If the request failed, such as if a
+            worksheet doesn't exist.
+    """
+    response = spreadsheet.values_batch_get(
+        [
+            gspread.utils.absolute_range_name(worksheet_name, range_name)
+            for worksheet_name, range_name in ranges
+        ],
+        params={"majorDimension": "COLUMNS"},
+    )
+    return [
+        value_range.get("values", [])
+        for value_range in response.get("valueRanges", [])
+    ]
+
+
+def _batch_read_roster_and_matches(spreadsheet):
+    """Reads the roster worksheet and the matches worksheet together in a
+    single request.
+
+    If the position of the matches header row is not known yet, it is
+    searched for in the first `MATCHES_HEADER_SEARCH_ROWS` rows and the
+    columns are fetched in a second request. If the header row is not
+    found there, the matches worksheet is not included.
+
+    Returns:
+        Union[
+            Tuple[str, None],
+            Tuple[None, Tuple[Dict[str, Any], Optional[str]]]
+        ]:
+            A tuple of an error message, or a tuple of a mapping from
+            worksheet name to the fetched values (in the same format as
+            the values saved in their snapshots) and the spreadsheet
+            fingerprint.
+    """
+    global GLOBAL_MATCHES_HEADER_POSITION  # pylint: disable=global-statement
+
+    # fetch the fingerprint first, same as `get_worksheet_snapshot()`
+    error_msg, fingerprint = _fetch_spreadsheet_fingerprint(spreadsheet)
+    if error_msg is not None:
+        print("!", error_msg)
+
+    position = GLOBAL_MATCHES_HEADER_POSITION
+    if position is None:
+        matches_ranges = [f"1:{MATCHES_HEADER_SEARCH_ROWS}"]
+    else:
+        matches_ranges = _matches_column_ranges(*position)
+    ranges = [(ROSTER_WORKSHEET_NAME, None)]
+    ranges.extend(
+        (MATCHES_WORKSHEET_NAME, range_name) for range_name in matches_ranges
+    )
+    try:
+        value_ranges = _values_batch_get(spreadsheet, ranges)
+    except gspread.exceptions.APIError as ex:
+        # such as if one of the worksheets doesn't exist
+        return f"Could not fetch worksheets together: {ex}", None
+
+    worksheet_values = {
+        ROSTER_WORKSHEET_NAME: _columns_to_rows(value_ranges[0])
+    }
+    matches_columns = None
+    if position is not None:
+        matches_columns = _check_matches_header_columns(value_ranges[1:])
+        if matches_columns is None:
+            # the header row moved
+            GLOBAL_MATCHES_HEADER_POSITION = None
+    else:
+        _, header_index, header_indices = _find_matches_header_row(
+            _columns_to_rows(value_ranges[1])
+        )
+        if header_index is not None:
+            column_ranges = _matches_column_ranges(
+                header_index, header_indices
+            )
+            try:
+                matches_columns = _check_matches_header_columns(
+                    _values_batch_get(
+                        spreadsheet,
+                        [
+                            (MATCHES_WORKSHEET_NAME, range_name)
+                            for range_name in column_ranges
+                        ],
+                    )
+                )
+            except gspread.exceptions.APIError as ex:
+                print("!", "Could not fetch matches worksheet:", ex)
+            if matches_columns is not None:
+                GLOBAL_MATCHES_HEADER_POSITION = (header_index, header_indices)
+    if matches_columns is not None:
+        worksheet_values[MATCHES_WORKSHEET_NAME] = matches_columns
+    return None, (worksheet_values, fingerprint)
+
+
+def fetch_roster(include_matches=False):
     """Fetches the full team roster from the TMS spreadsheet.
 
     No validation is done beyond required and optional columns.
 
+    If `include_matches` is True, the matches worksheet is fetched in the
+    same request, and its snapshot and the TMS match statuses are also
+    updated. This saves a request when the matches are fetched soon
+    after, such as when preparing for a tournament.
+
     Returns:
         Union[Tuple[str, None, None], Tuple[None, List, Dict]]:
             A tuple of: an error message, a list of log messages, and
@@ -366,17 +708,69 @@ def fetch_roster():
     def _fetch_error(msg):
         return msg, None, None
 
-    error_msg, spreadsheet = get_tms_spreadsheet()
+    prefetched = {}
+    prefetched_fingerprint = None
+    if include_matches:
+        error_msg, result = call_with_spreadsheet(
+            _batch_read_roster_and_matches
+        )
+        if error_msg is not None:
+            # fall back to only fetching the roster
+            print("!", error_msg)
+        else:
+            prefetched, prefetched_fingerprint = result
+
+    def _prefetched(worksheet_name):
+        if worksheet_name not in prefetched:
+            return None
+        return prefetched[worksheet_name], prefetched_fingerprint
+
+    error_msg, worksheet_values, _, fingerprint = get_worksheet_snapshot(
+        ROSTER_WORKSHEET_NAME,
+        lambda worksheet: (None, worksheet.get_values()),
+        description="Roster spreadsheet",
+        prefetched=_prefetched(ROSTER_WORKSHEET_NAME),
+    )
     if error_msg is not None:
         return _fetch_error(error_msg)
 
-    error_msg, worksheet = get_worksheet(
-        spreadsheet, ROSTER_WORKSHEET_NAME, description="Roster spreadsheet"
+    # the result could be modified by the caller, so always return a copy
+    error_msg, logs, roster = parse_with_cache(
+        ROSTER_WORKSHEET_NAME,
+        fingerprint,
+        partial(_parse_roster_values, worksheet_values),
+        copy_result=True,
     )
     if error_msg is not None:
         return _fetch_error(error_msg)
 
-    worksheet_values = worksheet.get_values()
+    # save the last fetched time
+    success = db.global_state.set_roster_last_fetched_time()
+    if not success:
+        return _fetch_error("Database error")
+
+    prefetched_matches = _prefetched(MATCHES_WORKSHEET_NAME)
+    if prefetched_matches is not None:
+        error_msg = fetch_matches_tms_status(prefetched=prefetched_matches)
+        if error_msg is not None:
+            # not a fatal error for the roster
+            print("!", "Error saving prefetched matches:", error_msg)
+
+    return None, logs, roster
+
+
+def _parse_roster_values(worksheet_values):
+    """Parses the values of the roster worksheet.
+
+    Returns:
+        Union[Tuple[str, None, None], Tuple[None, List, Dict]]:
+            A tuple of: an error message, a list of log messages, and
+            the full roster in the format returned by `fetch_roster()`.
+    """
+
+    def _fetch_error(msg):
+        return msg, None, None
+
     if len(worksheet_values) == 0:
         return _fetch_error(
             f"Empty roster worksheet {ROSTER_WORKSHEET_NAME!r}"
@@ -451,11 +845,6 @@ def fetch_roster():
         invalid_str = list_of_items(invalid_parts, sep="or")
         return _fetch_error(f"Empty roster (no valid {invalid_str} found)")
 
-    # save the last fetched time
-    success = db.global_state.set_roster_last_fetched_time()
-    if not success:
-        return _fetch_error("Database error")
-
     return None, logs, roster
 
 
@@ -641,12 +1030,11 @@ def process_roster(row_generator):
         if team_code is None:
             _log_error("Missing team code (skipped)")
             continue
-        team_code_match = TEAM_CODE_PATTERN.fullmatch(team_code)
-        if team_code_match is None:
+        parsed_team_code = _parse_team_code(team_code)
+        if parsed_team_code is None:
             _log_error(f"Invalid team code {team_code!r} (skipped)")
             continue
-        division, team_number = team_code_match.group("division", "number")
-        team_number = int(team_number)
+        division, team_number = parsed_team_code
         weight_class = row_data["fighting weight class"]
         if weight_class is not None:
             weight_class = weight_class.lower()
@@ -783,70 +1171,82 @@ def match_number_sort_key(match_number):
     return (index, match_number)
 
 
-def _extract_school_team_code(team_name):
-    match = SCHOOL_TEAM_CODE_PATTERN.fullmatch(team_name)
+# The same few hundred team names and codes are parsed on every fetch, so
+# the results are memoized.
+@lru_cache(maxsize=TEAM_NAME_PARSE_CACHE_SIZE)
+def _parse_team_code(team_code):
+    """Parses a team code such as "Men's A1".
+
+    Returns:
+        Optional[Tuple[str, int]]: The division and team number, or None
+            if the team code is invalid.
+    """
+    match = TEAM_CODE_PATTERN.fullmatch(team_code)
     if match is None:
-        return {"name": team_name, "valid": False}
-    school, division, number = match.group("school", "division", "number")
-    return {
-        "name": team_name,
-        "valid": True,
-        "school_team_code": (school, division, int(number)),
-    }
+        return None
+    division, number = match.group("division", "number")
+    return division, int(number)
 
 
-def fetch_match_teams(match_numbers):
-    """Fetches the team names for the given match numbers.
+@lru_cache(maxsize=TEAM_NAME_PARSE_CACHE_SIZE)
+def _parse_school_team_code(team_name):
+    """Parses a team name such as "Yale Men's A1".
 
     Returns:
-        Union[Tuple[str, None], Tuple[None, List[Dict]]]:
-            A tuple of an error message, or a list of matches in the
-            format:
-                'number': match number (int)
-                'found': True or False
-                    If False, the rest of the keys will not be present.
-                'division': the division
-                'round': the round of XX
-                'status': the match status
-                'blue_team':
-                    'name': the team name
-                    'valid': True or False
-                        If False, 'team_code' will not be present.
-                    'school_team_code':
-                        tuple of the school, division, and team number
-                'red_team': same as 'blue_team'
+        Optional[Tuple[str, str, int]]: The school, division, and team
+            number, or None if the team name is invalid.
     """
+    match = SCHOOL_TEAM_CODE_PATTERN.fullmatch(team_name)
+    if match is None:
+        return None
+    school, division, number = match.group("school", "division", "number")
+    return school, division, int(number)
 
-    def _fetch_error(msg):
-        return msg, None
 
-    remaining = set(match_numbers)
-    if len(remaining) == 0:
-        # no matches to fetch
-        return None, []
+def get_parse_cache_stats():
+    """Gets the hit and miss counts of the memoized team name parsers.
 
-    error_msg, spreadsheet = get_tms_spreadsheet()
-    if error_msg is not None:
-        return _fetch_error(error_msg)
+    Returns:
+        Dict[str, Dict[str, int]]: A mapping from each parser to its
+            "hits", "misses", and "size".
+    """
+    stats = {}
+    for name, func in (
+        ("team_code", _parse_team_code),
+        ("school_team_code", _parse_school_team_code),
+    ):
+        info = func.cache_info()
+        stats[name] = {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+        }
+    return stats
 
-    error_msg, worksheet = get_worksheet(
-        spreadsheet, MATCHES_WORKSHEET_NAME, description="Matches worksheet"
-    )
-    if error_msg is not None:
-        return _fetch_error(error_msg)
 
-    worksheet_values = worksheet.get_values()
-    if len(worksheet_values) == 0:
-        return _fetch_error(
-            f"Empty matches worksheet {MATCHES_WORKSHEET_NAME!r}"
-        )
+def _extract_school_team_code(team_name):
+    school_team_code = _parse_school_team_code(team_name)
+    if school_team_code is None:
+        return {"name": team_name, "valid": False}
+    return {
+        "name": team_name,
+        "valid": True,
+        "school_team_code": school_team_code,
+    }
+
 
-    worksheet_rows_iter = iter(worksheet_values)
+def _find_matches_header_row(rows):
+    """Finds the header row of the matches worksheet in the given rows,
+    which is the first row that (uniquely) contains all the headers.
 
-    # look for the header row
-    header_indices = None
+    Returns:
+        Union[Tuple[str, None, None], Tuple[None, int, Dict[str, int]]]:
+            A tuple of an error message, or the index of the header row
+            in the given rows and a mapping from each header to its
+            column index.
+    """
     possible_header_rows = []
-    for i, row in enumerate(worksheet_rows_iter):
+    for i, row in enumerate(rows):
         # get the first index of each value in this row
         row_indices = {}
         repeated_indices = set()
@@ -871,32 +1271,179 @@ def fetch_match_teams(match_numbers):
         if len(has_repeated) > 0:
             possible_header_rows.append(i + 1)
             continue
-        header_indices = filtered_indices
-        break
-
-    if header_indices is None:
-        # could not find the header row
-        if len(possible_header_rows) == 0:
-            required_headers = ", ".join(
-                f'"{header}"' for header in MATCHES_HEADERS
-            )
-            return _fetch_error(
+        return None, i, filtered_indices
+
+    # could not find the header row
+    if len(possible_header_rows) == 0:
+        required_headers = ", ".join(
+            f'"{header}"' for header in MATCHES_HEADERS
+        )
+        return (
+            (
                 "No rows were found with all required headers: "
                 f"{required_headers}"
-            )
-        if len(possible_header_rows) == 1:
-            row_str = f"Row {possible_header_rows[0]}"
-        else:
-            row_str = f"Rows {list_of_items(possible_header_rows)}"
-        return _fetch_error(
+            ),
+            None,
+            None,
+        )
+    if len(possible_header_rows) == 1:
+        row_str = f"Row {possible_header_rows[0]}"
+    else:
+        row_str = f"Rows {list_of_items(possible_header_rows)}"
+    return (
+        (
             f"{row_str} had all required headers, but some were repeated "
             "(ambiguous choices)"
+        ),
+        None,
+        None,
+    )
+
+
+def _matches_column_ranges(header_index, header_indices):
+    """Gets the ranges of the `MATCHES_HEADERS` columns of the matches
+    worksheet, starting from the given header row.
+
+    Returns:
+        List[str]: The ranges in A1 notation.
+    """
+    ranges = []
+    for header in MATCHES_HEADERS:
+        start_cell = gspread.utils.rowcol_to_a1(
+            header_index + 1, header_indices[header] + 1
+        )
+        column_label = start_cell.rstrip(string.digits)
+        ranges.append(f"{start_cell}:{column_label}")
+    return ranges
+
+
+def _check_matches_header_columns(value_ranges):
+    """Checks the values of the `MATCHES_HEADERS` columns fetched from
+    the ranges returned by `_matches_column_ranges()`.
+
+    Args:
+        value_ranges (List[List[List[str]]]): The fetched values of each
+            range, in columns.
+
+    Returns:
+        Optional[List[List[str]]]: The column values below the header
+            row in the order of `MATCHES_HEADERS`, all with the same
+            length, or None if the header row doesn't have the expected
+            headers.
+    """
+    columns = []
+    for header, value_range in zip(MATCHES_HEADERS, value_ranges):
+        # empty columns don't have any values at all
+        if len(value_range) == 0:
+            return None
+        column = value_range[0]
+        if len(column) == 0 or column[0].strip().lower() != header:
+            return None
+        columns.append(column[1:])
+    # trailing empty cells are not returned, so pad all the columns to
+    # the same length
+    num_rows = max(len(column) for column in columns)
+    for column in columns:
+        column.extend([""] * (num_rows - len(column)))
+    return columns
+
+
+def _fetch_matches_header_columns(worksheet, header_index, header_indices):
+    """Fetches the values of the `MATCHES_HEADERS` columns of the given
+    matches worksheet in a single batch request, starting from the given
+    header row.
+
+    Returns:
+        Optional[List[List[str]]]: The same as
+            `_check_matches_header_columns()`.
+    """
+    value_ranges = worksheet.batch_get(
+        _matches_column_ranges(header_index, header_indices),
+        major_dimension="COLUMNS",
+    )
+    return _check_matches_header_columns(value_ranges)
+
+
+def _fetch_matches_columns(worksheet):
+    """Fetches the values of the `MATCHES_HEADERS` columns below the
+    header row of the given matches worksheet.
+
+    If the header row was found in a previous fetch, the columns are
+    fetched from the same position, and the header row is only searched
+    for again if it moved. To search for the header row, only the first
+    `MATCHES_HEADER_SEARCH_ROWS` rows are fetched (falling back to the
+    entire worksheet if it is not found there). Then, only the needed
+    columns are fetched in a single batch request, so the amount of data
+    fetched does not depend on how wide the worksheet is.
+
+    Returns:
+        Union[Tuple[str, None], Tuple[None, List[List[str]]]]:
+            A tuple of an error message, or the column values in the
+            order of `MATCHES_HEADERS`. All the columns will have the
+            same length.
+    """
+    global GLOBAL_MATCHES_HEADER_POSITION  # pylint: disable=global-statement
+
+    def _fetch_error(msg):
+        return msg, None
+
+    if GLOBAL_MATCHES_HEADER_POSITION is not None:
+        columns = _fetch_matches_header_columns(
+            worksheet, *GLOBAL_MATCHES_HEADER_POSITION
+        )
+        if columns is not None:
+            return None, columns
+        # the header row moved
+        GLOBAL_MATCHES_HEADER_POSITION = None
+
+    rows = worksheet.get_values(f"1:{MATCHES_HEADER_SEARCH_ROWS}")
+    error_msg, header_index, header_indices = _find_matches_header_row(rows)
+    if (
+        error_msg is not None
+        # trailing empty rows are not returned, so check the size of the
+        # worksheet itself
+        and worksheet.row_count > MATCHES_HEADER_SEARCH_ROWS
+    ):
+        # the header row might be further down
+        rows = worksheet.get_values()
+        error_msg, header_index, header_indices = _find_matches_header_row(
+            rows
         )
+    if len(rows) == 0:
+        return _fetch_error(
+            f"Empty matches worksheet {MATCHES_WORKSHEET_NAME!r}"
+        )
+    if error_msg is not None:
+        return _fetch_error(error_msg)
 
-    # look at the remaining rows for the match numbers
+    columns = _fetch_matches_header_columns(
+        worksheet, header_index, header_indices
+    )
+    if columns is None:
+        # the worksheet was edited in between the requests
+        return _fetch_error("Matches worksheet changed while fetching")
+    GLOBAL_MATCHES_HEADER_POSITION = (header_index, header_indices)
+    return None, columns
+
+
+def _build_matches_index(columns):
+    """Builds an index of the matches worksheet by match number.
+
+    Args:
+        columns (List[List[str]]): The column values as returned by
+            `_fetch_matches_columns()`.
+
+    Returns:
+        Tuple[Dict[int, Dict], Dict[int, str]]:
+            The matches, which map match numbers to the info of the
+            first row with that match number (the same as the values in
+            `fetch_match_teams()`, other than 'number' and 'found'), and
+            the TMS statuses, which map match numbers to the first
+            non-empty status seen.
+    """
+    matches = {}
     tms_match_statuses = {}
-    matches_info = []
-    for row in worksheet_rows_iter:
+    for row in zip(*columns):
         (
             match_number,
             division,
@@ -904,8 +1451,7 @@ def fetch_match_teams(match_numbers):
             match_status,
             blue_team_name,
             red_team_name,
-        ) = (row[header_indices[header]].strip() for header in MATCHES_HEADERS)
-
+        ) = (value.strip() for value in row)
         if not match_number.isdigit():
             continue
         match_number = int(match_number)
@@ -916,24 +1462,153 @@ def fetch_match_teams(match_numbers):
             if match_number not in tms_match_statuses:
                 tms_match_statuses[match_number] = match_status
 
-        if match_number not in remaining:
+        if match_number in matches:
             continue
+        matches[match_number] = {
+            "division": division,
+            "round": round_of,
+            "status": match_status,
+            "blue_team": _extract_school_team_code(blue_team_name),
+            "red_team": _extract_school_team_code(red_team_name),
+        }
+    return matches, tms_match_statuses
+
+
+def _fetch_matches_index(prefetched=None):
+    """Fetches the index of the matches worksheet.
+
+    The index is only built once for each version of the worksheet.
+
+    Args:
+        prefetched (Optional[Tuple[List[List[str]], Optional[str]]]):
+            The column values as returned by `_fetch_matches_columns()`
+            and the spreadsheet fingerprint, if they were already
+            fetched.
+
+    Returns:
+        Union[
+            Tuple[str, None, None, None],
+            Tuple[None, Dict[int, Dict], Dict[int, str], datetime]
+        ]:
+            A tuple of an error message, or the matches and the TMS
+            statuses as returned by `_build_matches_index()` and the
+            time they were fetched. The returned index should not be
+            modified.
+    """
+    error_msg, columns, time_fetched, fingerprint = get_worksheet_snapshot(
+        MATCHES_WORKSHEET_NAME,
+        _fetch_matches_columns,
+        description="Matches worksheet",
+        prefetched=prefetched,
+    )
+    if error_msg is not None:
+        return error_msg, None, None, None
+
+    matches, tms_match_statuses = parse_with_cache(
+        MATCHES_WORKSHEET_NAME,
+        fingerprint,
+        partial(_build_matches_index, columns),
+    )
+    return None, matches, tms_match_statuses, time_fetched
+
+
+def _get_match_divisions(matches):
+    """Returns a mapping from match number to division for the given
+    matches index.
+    """
+    return {
+        match_number: match_info["division"]
+        for match_number, match_info in matches.items()
+    }
+
+
+def fetch_matches_tms_status(prefetched=None):
+    """Fetches the TMS status of all the matches in the matches worksheet
+    and saves them in the database.
+
+    Args:
+        prefetched (Optional[Tuple[List[List[str]], Optional[str]]]):
+            The same as for `_fetch_matches_index()`.
+
+    Returns:
+        Optional[str]: An error message, if any.
+    """
+    (
+        error_msg,
+        matches,
+        tms_match_statuses,
+        time_fetched,
+    ) = _fetch_matches_index(prefetched)
+    if error_msg is not None:
+        return error_msg
+
+    success = db.match_status.set_matches_tms_status(
+        tms_match_statuses, time_fetched, _get_match_divisions(matches)
+    )
+    if not success:
+        return "Database error"
+    return None
+
 
+def fetch_match_teams(match_numbers):
+    """Fetches the team names for the given match numbers.
+
+    Returns:
+        Union[Tuple[str, None], Tuple[None, List[Dict]]]:
+            A tuple of an error message, or a list of matches in the
+            format:
+                'number': match number (int)
+                'found': True or False
+                    If False, the rest of the keys will not be present.
+                'division': the division
+                'round': the round of XX
+                'status': the match status
+                'blue_team':
+                    'name': the team name
+                    'valid': True or False
+                        If False, 'team_code' will not be present.
+                    'school_team_code':
+                        tuple of the school, division, and team number
+                'red_team': same as 'blue_team'
+    """
+
+    def _fetch_error(msg):
+        return msg, None
+
+    remaining = set(match_numbers)
+    if len(remaining) == 0:
+        # no matches to fetch
+        return None, []
+
+    (
+        error_msg,
+        matches,
+        tms_match_statuses,
+        time_fetched,
+    ) = _fetch_matches_index()
+    if error_msg is not None:
+        return _fetch_error(error_msg)
+
+    # look up the match numbers in the index
+    matches_info = []
+    for match_number in remaining:
+        match_info = matches.get(match_number, None)
+        if match_info is None:
+            continue
+        # copy so that the cached index isn't modified
         matches_info.append(
             {
                 "number": match_number,
                 "found": True,
-                "division": division,
-                "round": round_of,
-                "status": match_status,
-                "blue_team": _extract_school_team_code(blue_team_name),
-                "red_team": _extract_school_team_code(red_team_name),
+                **copy.deepcopy(match_info),
             }
         )
-        remaining.remove(match_number)
+    remaining.difference_update(info["number"] for info in matches_info)
 
     # save the last seen TMS statuses
-    success = db.match_status.set_matches_tms_status(tms_match_statuses)
+    success = db.match_status.set_matches_tms_status(
+        tms_match_statuses, time_fetched, _get_match_divisions(matches)
+    )
     if not success:
         return _fetch_error("Database error")
 
@@ -0,0 +1,196 @@
+"""
+Rate limiting for the Google Sheets API calls.
+
+All the requests made by the gspread client go through a token bucket,
+so that bursts of fetches stay under the per-minute read quota. If a
+request is still rate limited (HTTP 429), it is retried with an
+exponential backoff, as long as the total wait stays short enough for a
+request thread (well below gunicorn's default 30 second worker
+timeout). Otherwise, the rate limit error is raised to the caller.
+"""
+
+# =============================================================================
+
+import random
+import threading
+import time
+
+import gspread
+
+# =============================================================================
+
+__all__ = (
+    "TokenBucket",
+    "ThrottledClient",
+    "init_app",
+    "get_stats",
+)
+
+# =============================================================================
+
+# The status codes of responses that should be retried
+RETRY_STATUS_CODES = {429}
+
+# The base and maximum number of seconds to wait before retrying
+BACKOFF_BASE = 1
+BACKOFF_MAX = 8
+# The maximum total number of seconds to wait for retries of a single
+# request; a longer "Retry-After" is not waited for at all
+RETRY_TOTAL_MAX = 15
+
+# =============================================================================
+
+
+class TokenBucket:
+    """A thread-safe token bucket.
+
+    Tokens are added at a constant rate up to a maximum capacity, and
+    each call takes one token, waiting until one is available.
+    """
+
+    def __init__(self, rate, capacity):
+        """
+        Args:
+            rate (float): The number of tokens added per second.
+            capacity (int): The maximum number of tokens, which is the
+                largest burst of calls allowed at once.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last_time = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Takes a token, waiting until one is available.
+
+        Returns:
+            float: The number of seconds waited.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity,
+                self._tokens + (now - self._last_time) * self.rate,
+            )
+            self._last_time = now
+            # reserve the token now so that waiting calls are served in
+            # order
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0
+            wait_time = -self._tokens / self.rate
+        time.sleep(wait_time)
+        return wait_time
+
+
+# =============================================================================
+
+# The shared bucket for all the clients in this process (not limited if
+# None)
+_BUCKET = None
+# The maximum number of times to retry a rate limited request
+_MAX_RETRIES = 5
+
+_STATS_LOCK = threading.Lock()
+_STATS = {
+    # the number of requests that had to wait for a token
+    "throttled": 0,
+    # the number of requests that were retried after being rate limited
+    "retried": 0,
+    # the number of rate limited requests that were not retried because
+    # the wait would have been too long
+    "gave_up": 0,
+}
+
+
+def _increment_stat(key):
+    with _STATS_LOCK:
+        _STATS[key] += 1
+
+
+def _retry_delay(response, attempt):
+    """Returns the number of seconds to wait before retrying the given
+    response, preferring the "Retry-After" header if it was given (which
+    may be longer than `BACKOFF_MAX`).
+    """
+    retry_after = response.headers.get("Retry-After", None)
+    if retry_after is not None:
+        try:
+            return max(0, float(retry_after))
+        except ValueError:
+            # could be an HTTP date; just use the backoff
+            pass
+    # exponential backoff with full jitter
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2**attempt))
+
+
+class ThrottledClient(gspread.Client):
+    """A gspread client that rate limits all of its requests and retries
+    rate limited requests.
+    """
+
+    def request(self, *args, **kwargs):  # pylint: disable=arguments-differ
+        attempt = 0
+        total_delay = 0
+        while True:
+            if _BUCKET is not None and _BUCKET.acquire() > 0:
+                _increment_stat("throttled")
+            try:
+                return super().request(*args, **kwargs)
+            except gspread.exceptions.APIError as ex:
+                status_code = ex.response.status_code
+                if (
+                    status_code not in RETRY_STATUS_CODES
+                    or attempt >= _MAX_RETRIES
+                ):
+                    raise
+                delay = _retry_delay(ex.response, attempt)
+                if total_delay + delay > RETRY_TOTAL_MAX:
+                    # don't hold up the request thread any longer
+                    _increment_stat("gave_up")
+                    raise
+            total_delay += delay
+            _increment_stat("retried")
+            attempt += 1
+            print(
+                "!",
+                f"Google Sheets request got status {status_code}; retrying in",
+                f"{delay:.2f}s (attempt {attempt} of {_MAX_RETRIES})",
+            )
+            time.sleep(delay)
+
+
+# =============================================================================
+
+
+def init_app(app):
+    """Sets up the rate limit from the app config values
+    `SHEETS_REQUESTS_PER_MINUTE`, `SHEETS_REQUESTS_BURST`, and
+    `SHEETS_MAX_RETRIES`.
+    """
+    global _BUCKET, _MAX_RETRIES  # pylint: disable=global-statement
+
+    per_minute = app.config.get("SHEETS_REQUESTS_PER_MINUTE", None)
+    if per_minute:
+        burst = app.config.get("SHEETS_REQUESTS_BURST", None) or per_minute
+        _BUCKET = TokenBucket(per_minute / 60, burst)
+    else:
+        _BUCKET = None
+    _MAX_RETRIES = app.config.get("SHEETS_MAX_RETRIES", _MAX_RETRIES)
+
+
+def get_stats():
+    """Returns the rate limit stats for this process.
+
+    Returns:
+        Dict[str, int]: The stats in the format:
+            'throttled': the number of requests that had to wait for the
+                rate limit
+            'retried': the number of requests that were retried after
+                being rate limited by Google
+            'gave_up': the number of rate limited requests that were not
+                retried because the wait would have been too long
+    """
+    with _STATS_LOCK:
+        return dict(_STATS)
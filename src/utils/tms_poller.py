@@ -0,0 +1,201 @@
+"""
+Background polling of the match statuses in the TMS spreadsheet.
+
+When enabled, a daemon thread in each server process periodically
+fetches the statuses of all the matches and saves them in the database,
+so that the TMS Matches Status page stays up-to-date without an admin
+having to fetch any matches.
+
+With Postgres, only the process holding an advisory lock actually polls,
+so running multiple server processes doesn't multiply the requests to
+the Google Sheets API. If that process exits, its connection closes and
+another process takes over on its next poll. The info about the last
+poll is saved in the global state, so that every process can show it.
+"""
+
+# =============================================================================
+
+import random
+import threading
+import time
+from datetime import datetime
+
+import sqlalchemy
+
+import db
+import utils
+from db.models import db as sql_db
+from utils import fetch_tms
+
+# =============================================================================
+
+__all__ = (
+    "init_app",
+    "get_poll_info",
+)
+
+# =============================================================================
+
+_POLLER = None
+
+# The key of the Postgres advisory lock held by the polling process
+# (an arbitrary number that no other lock should use)
+POLLER_LOCK_KEY = 7_316_480_211
+
+# =============================================================================
+
+
+class TMSStatusPoller:
+    """Periodically fetches the TMS match statuses in a daemon thread."""
+
+    def __init__(self, app, interval, jitter=0):
+        """
+        Args:
+            app (flask.Flask): The app, for the database connection.
+            interval (float): The number of seconds between each poll.
+            jitter (float): The maximum number of seconds to randomly
+                add to each interval, so that multiple server processes
+                don't all poll at the same time.
+        """
+        self._app = app
+        self.interval = interval
+        self.jitter = jitter
+
+        self._thread = None
+        self._lock = threading.Lock()
+        # the connection holding the advisory lock, if this process is the
+        # one polling
+        self._lock_connection = None
+
+    def start(self):
+        """Starts the polling thread if it hasn't been started yet."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="tms-status-poller", daemon=True
+            )
+            self._thread.start()
+
+    def _wait_time(self):
+        return self.interval + random.uniform(0, self.jitter)
+
+    def _run(self):
+        # wait a random amount before the first poll as well
+        time.sleep(random.uniform(0, self.jitter))
+        while True:
+            self.poll()
+            time.sleep(self._wait_time())
+
+    def _is_leader(self):
+        """Returns whether this process should poll, trying to take the
+        advisory lock if no process holds it. Must be called in an app
+        context.
+        """
+        engine = sql_db.engine
+        if engine.dialect.name != "postgresql":
+            # no other processes to coordinate with
+            return True
+
+        if self._lock_connection is not None:
+            try:
+                self._lock_connection.exec_driver_sql("SELECT 1")
+                self._lock_connection.commit()
+                return True
+            except sqlalchemy.exc.DBAPIError:
+                # the connection was lost, and the lock with it
+                self._lock_connection.invalidate()
+                self._lock_connection = None
+
+        connection = engine.connect()
+        try:
+            is_leader = connection.execute(
+                sqlalchemy.text("SELECT pg_try_advisory_lock(:key)"),
+                {"key": POLLER_LOCK_KEY},
+            ).scalar()
+            connection.commit()
+        except sqlalchemy.exc.DBAPIError:
+            is_leader = False
+        if not is_leader:
+            connection.close()
+            return False
+        # keep the connection open (and out of the pool) to hold the lock
+        self._lock_connection = connection
+        return True
+
+    def poll(self):
+        """Fetches and saves the TMS match statuses once, if this process
+        is the one polling, along with the info about the poll.
+        """
+        start_time = datetime.utcnow()
+        start = time.perf_counter()
+        with self._app.app_context():
+            try:
+                if not self._is_leader():
+                    return
+                error_msg = fetch_tms.fetch_matches_tms_status()
+            except Exception as ex:  # pylint: disable=broad-exception-caught
+                # never let the thread die
+                sql_db.session.rollback()
+                error_msg = f"{type(ex).__name__}: {ex}"
+            duration = time.perf_counter() - start
+            if error_msg is not None:
+                print(
+                    "!", "Error while polling TMS match statuses:", error_msg
+                )
+            # set all the info together so that it's always consistent
+            try:
+                db.global_state.set_tms_last_poll(
+                    start_time, duration, error_msg
+                )
+            except sqlalchemy.exc.SQLAlchemyError as ex:
+                sql_db.session.rollback()
+                print("!", "Database error while saving the poll info:", ex)
+
+
+# =============================================================================
+
+
+def init_app(app):
+    """Sets up the poller for the given app, if it is enabled in the
+    config with `TMS_POLL_INTERVAL`.
+
+    The thread is started on the first request so that it is only
+    started in actual server processes (not, for instance, when running
+    `flask db upgrade`).
+    """
+    global _POLLER  # pylint: disable=global-statement
+
+    interval = app.config.get("TMS_POLL_INTERVAL", None)
+    if not interval:
+        return
+    _POLLER = TMSStatusPoller(
+        app, interval, jitter=app.config.get("TMS_POLL_JITTER", 0)
+    )
+
+    @app.before_request
+    def start_tms_poller():
+        _POLLER.start()
+
+
+def get_poll_info(tz=utils.EASTERN_TZ):
+    """Returns info about the poller, or None if polling is disabled. The
+    info about the last poll comes from the process that polled.
+
+    Returns:
+        Optional[Dict]: The poller info in the format:
+            'interval': the number of seconds between each poll
+            'last_poll_time': when the last poll started (as a str)
+            'last_poll_duration': the number of seconds the last poll
+                took
+            'last_error': the error message from the last poll
+    """
+    if _POLLER is None:
+        return None
+    poll_time, duration, error_msg = db.global_state.get_tms_last_poll(tz)
+    return {
+        "interval": _POLLER.interval,
+        "last_poll_time": utils.dt_str(poll_time),
+        "last_poll_duration": duration,
+        "last_error": error_msg,
+    }
@@ -7,7 +7,7 @@ pages.
 
 import json
 
-from flask import flash, request
+from flask import Response, flash, request, stream_with_context
 
 import db
 import utils
@@ -151,7 +151,8 @@ def fetch_roster():
     error_messages = []
 
     print(" ", "Fetching teams roster from TMS spreadsheet")
-    error_msg, logs, roster = fetch_tms.fetch_roster()
+    # matches are usually fetched right after, so fetch them together
+    error_msg, logs, roster = fetch_tms.fetch_roster(include_matches=True)
     if error_msg is not None:
         if flash_all:
             flash(error_msg, "fetch-roster.danger")
@@ -207,19 +208,23 @@ def fetch_roster():
     if not all_emails_invalid:
         # save in database
         print(" ", "Saving the roster to the database")
-        success = db.roster.set_roster(roster)
-        if success:
+        error_msg, changes = db.roster.set_roster(roster)
+        if error_msg is None:
+            changes_str = "; ".join(
+                f"{key}: {counts['inserted']} added, "
+                f"{counts['updated']} updated, {counts['deleted']} removed"
+                for key, counts in changes.items()
+            )
             logs.append(
                 {
                     "level": "INFO",
                     "row_num": None,
-                    "message": "Saved roster in database",
+                    "message": f"Saved roster in database ({changes_str})",
                 }
             )
         else:
             # probably won't happen due to validation/constraint errors,
             # since `fetch_roster()` should have good enough checks
-            error_msg = "Database error"
             error_messages.append(error_msg)
             logs.append(
                 {"level": "ERROR", "row_num": None, "message": error_msg}
@@ -390,7 +395,71 @@ def view_full_roster():
 @app.route("/full_roster/raw", methods=["GET"])
 @login_required(admin=True)
 def view_full_roster_raw():
-    return db.roster.get_full_roster(as_json=True)
+    # "json" (default) or "ndjson"
+    response_format = request.args.get("format", "json").lower()
+    if response_format not in ("json", "ndjson"):
+        return unsuccessful(f"Invalid format: {response_format!r}")
+
+    def generate_json():
+        # a JSON object mapping the table keys to lists of rows
+        yield "{"
+        for i, (key, chunks) in enumerate(db.roster.iter_full_roster()):
+            if i > 0:
+                yield ","
+            yield f"{utils.json_dump_compact(key)}:["
+            is_first = True
+            for rows in chunks:
+                if not is_first:
+                    yield ","
+                is_first = False
+                yield ",".join(map(utils.json_dump_compact, rows))
+            yield "]"
+        yield "}\n"
+
+    def generate_ndjson():
+        # one JSON object per line for each row, with its table key
+        for key, chunks in db.roster.iter_full_roster():
+            for rows in chunks:
+                yield "".join(
+                    utils.json_dump_compact({"table": key, "row": row}) + "\n"
+                    for row in rows
+                )
+
+    if response_format == "ndjson":
+        return Response(
+            stream_with_context(generate_ndjson()),
+            mimetype="application/x-ndjson",
+        )
+    return Response(
+        stream_with_context(generate_json()), mimetype="application/json"
+    )
+
+
+# =============================================================================
+
+
+@app.route("/matches_status/time_in_status", methods=["GET"])
+@login_required(admin=True)
+def get_time_in_status():
+    # comma-separated percentiles from 0 to 100
+    percentiles_str = request.args.get("percentiles", "50,90,95")
+    try:
+        percentiles = [
+            float(percentile)
+            for percentile in percentiles_str.split(",")
+            if percentile.strip() != ""
+        ]
+    except ValueError:
+        return unsuccessful("Invalid percentiles")
+    if len(percentiles) == 0 or not all(0 <= p <= 100 for p in percentiles):
+        return unsuccessful("Percentiles must be between 0 and 100")
+    # show whole percentiles without a decimal point
+    percentiles = [int(p) if p.is_integer() else p for p in percentiles]
+
+    time_in_status = db.match_status.get_time_in_status_percentiles(
+        percentiles
+    )
+    return {"success": True, "divisions": time_in_status}
 
 
 # =============================================================================
@@ -399,5 +468,44 @@ def view_full_roster_raw():
 @app.route("/sent_emails", methods=["GET"])
 @login_required(admin=True)
 def view_sent_emails():
-    sent_emails = db.sent_emails.get_all_sent_emails()
-    return _render("/admin/sent_emails.jinja", sent_emails=sent_emails)
+    cursor = request.args.get("cursor", None)
+    error_msg, page = db.sent_emails.get_sent_emails_page(cursor)
+    if error_msg is not None:
+        flash(error_msg, "sent-emails.danger")
+        page = {"sent_emails": [], "next_cursor": None}
+    return _render(
+        "/admin/sent_emails.jinja",
+        sent_emails=page["sent_emails"],
+        next_cursor=page["next_cursor"],
+        is_first_page=cursor is None,
+    )
+
+
+@app.route("/sent_emails/page", methods=["GET"])
+@login_required(admin=True)
+def get_sent_emails_page():
+    cursor = request.args.get("cursor", None)
+    page_size = request.args.get(
+        "page_size", db.sent_emails.SENT_EMAILS_PAGE_SIZE, type=int
+    )
+    error_msg, page = db.sent_emails.get_sent_emails_page(cursor, page_size)
+    if error_msg is not None:
+        return unsuccessful(error_msg)
+    return {"success": True, **page}
+
+
+@app.route("/sent_emails/recipients", methods=["GET"])
+@login_required(admin=True)
+def get_sent_email_recipients():
+    # comma-separated ids of the sent emails
+    email_sent_ids_str = request.args.get("ids", "")
+    try:
+        email_sent_ids = [
+            int(email_sent_id)
+            for email_sent_id in email_sent_ids_str.split(",")
+            if email_sent_id.strip() != ""
+        ]
+    except ValueError:
+        return unsuccessful("Invalid sent email ids")
+    recipients = db.sent_emails.get_recipients(email_sent_ids)
+    return {"success": True, "recipients": recipients}
@@ -41,6 +41,8 @@ def admin_settings():
         super_admins=super_admins,
         service_account_email=service_account_email,
         tms_spreadsheet_url=tms_spreadsheet_url,
+        connection_stats=fetch_tms.get_connection_stats(),
+        parse_cache_stats=fetch_tms.get_parse_cache_stats(),
         has_mc_api_key=has_mc_api_key,
         mc_audience_tag=mc_audience_tag,
     )
@@ -52,6 +54,8 @@ def set_tms_spreadsheet():
     if request.method == "DELETE":
         print(" ", "Clearing TMS spreadsheet url")
         success = db.global_state.clear_tms_spreadsheet_id()
+        if success:
+            success = db.worksheet_snapshots.clear_snapshots()
         if not success:
             error_msg = "Database error"
             print(" ", "Error:", error_msg)
@@ -92,6 +96,8 @@ def set_tms_spreadsheet():
     success = db.global_state.set_tms_spreadsheet_id(spreadsheet_id)
     if not success:
         return unsuccessful("Database error", "Saving url")
+    # make sure the next fetches use the latest values
+    _ = db.worksheet_snapshots.invalidate(spreadsheet_id)
 
     success_msg = "Successfully saved TMS spreadsheet"
     print(" ", success_msg)
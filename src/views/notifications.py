@@ -578,6 +578,11 @@ def send_match_notification():
         additional_recipient_roles.append("COACH")
     if send_to_spectators:
         additional_recipient_roles.append("SPECTATOR")
+    # maps: school name -> list of emails of additional recipients
+    schools_recipients = db.roster.get_users_for_schools(
+        {school for school, _, _ in all_team_names},
+        additional_recipient_roles,
+    )
     if send_to_subscribers:
         teams_subscribers = db.subscriptions.get_all_subscribers(
             all_team_names
@@ -615,12 +620,7 @@ def send_match_notification():
 
             # add other recipients
             school_name = team_info["school"]
-            if len(additional_recipient_roles) > 0:
-                valid_emails.extend(
-                    db.roster.get_users_for_school(
-                        school_name, additional_recipient_roles
-                    )
-                )
+            valid_emails.extend(schools_recipients.get(school_name, []))
             # add subscribers
             valid_emails.extend(teams_subscribers.get(school_team_code, []))
 
@@ -832,7 +832,10 @@ def send_blast_notification():
         if division == "":
             errors["RECIPIENTS"] = "Division is empty"
         else:
-            division_emails = db.roster.get_emails_for_division(division)
+            # already sorted and distinct
+            division_emails = list(
+                db.roster.iter_emails_for_division(division)
+            )
             if len(division_emails) == 0:
                 errors[
                     "RECIPIENTS"
@@ -928,7 +931,7 @@ def send_blast_notification():
             template_id,
             subject,
             segment_id,
-            sorted(division_emails),
+            division_emails,
         )
 
     if error_msg is not None:
@@ -5,7 +5,7 @@ Shared global views.
 # =============================================================================
 
 import db
-from utils import changelog, fetch_tms
+from utils import changelog, fetch_tms, tms_poller
 from utils.auth import set_redirect_page
 from utils.server import AppRoutes, _render
 
@@ -63,4 +63,5 @@ def view_matches_status():
         hundreds=hundreds,
         statuses=ordered_statuses,
         status_accents=fetch_tms.MATCH_STATUS_TABLE_ACCENTS,
+        poll_info=tms_poller.get_poll_info(),
     )
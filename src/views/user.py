@@ -72,10 +72,11 @@ def subscriptions():
 
             if request.method == "POST":
                 # add all teams (that the user isn't on)
+                user_team_ids = db.roster.get_team_ids_for_user(user_email)
                 school_team_codes = [
                     team.school_team_code
                     for team in db.roster.get_all_teams(**teams_filter)
-                    if not team.has_user_email(user_email)
+                    if team.id not in user_team_ids
                 ]
                 success = db.subscriptions.add_all_teams(
                     user_email, school_team_codes
@@ -137,6 +138,7 @@ def subscriptions():
 
     # get subscriptions
     user_subscriptions = db.subscriptions.get_all_subscriptions(user_email)
+    user_team_ids = db.roster.get_team_ids_for_user(user_email)
 
     divisions = set()
 
@@ -159,7 +161,7 @@ def subscriptions():
         division_subscriptions[team_number] = {
             "name": team.name,
             "is_subscribed": school_team_code in user_subscriptions,
-            "is_user_on_team": team.has_user_email(user_email),
+            "is_user_on_team": team.id in user_team_ids,
         }
 
     return _render(
@@ -0,0 +1,35 @@
+"""
+Fixtures for the tests.
+
+The tests use an in-memory SQLite database by default. Set the
+`TEST_DATABASE_URI` environment variable to run them against another
+database (such as a scratch Postgres database).
+"""
+
+# =============================================================================
+
+import os
+
+import pytest
+from flask import Flask
+
+import db
+from db.models import db as sql_db
+
+# =============================================================================
+
+
+@pytest.fixture
+def app():
+    """An app with an empty database, inside an app context."""
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get(
+        "TEST_DATABASE_URI", "sqlite://"
+    )
+    db.init_app(app)
+    with app.app_context():
+        sql_db.create_all()
+        yield app
+        # an open transaction would block dropping the tables
+        sql_db.session.rollback()
+        sql_db.drop_all()
@@ -0,0 +1,271 @@
+"""
+Tests for the bulk insert and upsert helpers.
+"""
+
+# =============================================================================
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from db._utils import bulk_insert, bulk_insert_missing, bulk_upsert
+from db.models import (
+    MatchStatusCode,
+    MatchStatusTransition,
+    School,
+    Team,
+    TeamMember,
+    TMSMatchStatus,
+    User,
+    db,
+)
+
+# =============================================================================
+
+TIME = datetime(2026, 3, 1, 12, 0, 0)
+
+# =============================================================================
+
+
+def _statuses():
+    return {
+        match_status.match_number: (
+            match_status.status,
+            match_status.last_updated,
+        )
+        for match_status in TMSMatchStatus.query.all()
+    }
+
+
+def _upsert_statuses(rows, **kwargs):
+    return bulk_upsert(
+        TMSMatchStatus,
+        rows,
+        TMSMatchStatus.match_number,
+        changed_column=TMSMatchStatus.status,
+        newer_column=TMSMatchStatus.last_updated,
+        returning=(TMSMatchStatus.match_number, TMSMatchStatus.status),
+        **kwargs,
+    )
+
+
+def _status_row(match_number, status, last_updated):
+    return {
+        "match_number": match_number,
+        "status": status,
+        "last_updated": last_updated,
+    }
+
+
+# =============================================================================
+
+
+def test_bulk_insert_returns_ids(app):
+    names = ["Alpha", "Beta", "Gamma"]
+    ids = bulk_insert(
+        School, [{"name": name} for name in names], School.name, School.id
+    )
+    db.session.commit()
+
+    assert set(ids.keys()) == set(names)
+    assert len(set(ids.values())) == len(names)
+    for school in School.query.all():
+        assert ids[school.name] == school.id
+
+
+def test_bulk_insert_composite_key(app):
+    school_ids = bulk_insert(
+        School, [{"name": "Alpha"}, {"name": "Beta"}], School.name, School.id
+    )
+    rows = [
+        {"school_id": school_ids["Alpha"], "division": "A", "number": 1},
+        {"school_id": school_ids["Alpha"], "division": "A", "number": 2},
+        {"school_id": school_ids["Beta"], "division": "A", "number": 1},
+    ]
+    team_ids = bulk_insert(
+        Team, rows, (Team.school_id, Team.division, Team.number), Team.id
+    )
+    db.session.commit()
+
+    assert team_ids == {
+        (team.school_id, team.division, team.number): team.id
+        for team in Team.query.all()
+    }
+    assert len(team_ids) == len(rows)
+
+
+def test_bulk_insert_without_ids(app):
+    school_ids = bulk_insert(
+        School, [{"name": "Alpha"}], School.name, School.id
+    )
+    user_ids = bulk_insert(
+        User,
+        [
+            {
+                "email": "a@alpha.edu",
+                "first_name": "A",
+                "last_name": "A",
+                "role": "ATHLETE",
+                "school_id": school_ids["Alpha"],
+            }
+        ],
+        User.email,
+        User.id,
+    )
+    team_ids = bulk_insert(
+        Team,
+        [{"school_id": school_ids["Alpha"], "division": "A", "number": 1}],
+        (Team.school_id, Team.division, Team.number),
+        Team.id,
+    )
+
+    result = bulk_insert(
+        TeamMember,
+        [
+            {
+                "team_id": team_ids[(school_ids["Alpha"], "A", 1)],
+                "user_id": user_ids["a@alpha.edu"],
+                "slot": "light",
+            }
+        ],
+    )
+    db.session.commit()
+
+    assert result == {}
+    assert TeamMember.query.count() == 1
+
+
+def test_bulk_insert_empty(app):
+    assert bulk_insert(School, [], School.name, School.id) == {}
+    assert School.query.count() == 0
+
+
+def test_bulk_insert_missing_skips_existing(app):
+    bulk_insert_missing(
+        MatchStatusCode, [{"status": "Queued"}], MatchStatusCode.status
+    )
+    db.session.commit()
+    inserted = bulk_insert_missing(
+        MatchStatusCode,
+        [{"status": "Queued"}, {"status": "Called"}],
+        MatchStatusCode.status,
+    )
+    db.session.commit()
+
+    assert inserted == 1
+    assert sorted(code.status for code in MatchStatusCode.query.all()) == [
+        "Called",
+        "Queued",
+    ]
+
+
+def test_bulk_insert_missing_composite_key(app):
+    bulk_insert_missing(
+        MatchStatusCode, [{"status": "Queued"}], MatchStatusCode.status
+    )
+    code = MatchStatusCode.query.one().code
+    key = (
+        MatchStatusTransition.match_number,
+        MatchStatusTransition.time_changed,
+    )
+    row = {"match_number": 1, "time_changed": TIME, "status_code": code}
+    assert bulk_insert_missing(MatchStatusTransition, [row], key) == 1
+    assert bulk_insert_missing(MatchStatusTransition, [row], key) == 0
+    db.session.commit()
+    assert MatchStatusTransition.query.count() == 1
+
+
+def test_bulk_upsert_inserts_and_updates_changed(app):
+    changed = _upsert_statuses(
+        [_status_row(1, "Queued", TIME), _status_row(2, "Queued", TIME)]
+    )
+    db.session.commit()
+    assert sorted(changed) == [(1, "Queued"), (2, "Queued")]
+
+    later = TIME + timedelta(minutes=1)
+    changed = _upsert_statuses(
+        [_status_row(1, "Queued", later), _status_row(2, "Called", later)]
+    )
+    db.session.commit()
+
+    # the unchanged status keeps its original time
+    assert changed == [(2, "Called")]
+    assert _statuses() == {1: ("Queued", TIME), 2: ("Called", later)}
+
+
+def test_bulk_upsert_skips_stale_rows(app):
+    later = TIME + timedelta(minutes=1)
+    _upsert_statuses([_status_row(1, "Called", later)])
+    db.session.commit()
+
+    # an older fetch that finishes last doesn't overwrite the newer status
+    changed = _upsert_statuses([_status_row(1, "Queued", TIME)])
+    db.session.commit()
+
+    assert changed == []
+    assert _statuses() == {1: ("Called", later)}
+
+
+def test_bulk_upsert_keep_unchanged(app):
+    def _upsert(status, last_fetched):
+        return bulk_upsert(
+            TMSMatchStatus,
+            [
+                {
+                    "match_number": 1,
+                    "status": status,
+                    "last_updated": last_fetched,
+                    "last_fetched": last_fetched,
+                }
+            ],
+            TMSMatchStatus.match_number,
+            changed_column=TMSMatchStatus.status,
+            newer_column=TMSMatchStatus.last_fetched,
+            keep_unchanged=(TMSMatchStatus.last_updated,),
+            returning=(TMSMatchStatus.last_updated,),
+        )
+
+    later = TIME + timedelta(minutes=1)
+    latest = TIME + timedelta(minutes=2)
+    assert _upsert("Queued", TIME) == [(TIME,)]
+    # the same status still moves the last fetched time forward
+    assert _upsert("Queued", later) == [(TIME,)]
+    assert _upsert("Called", latest) == [(latest,)]
+    assert _upsert("Queued", later) == []
+    db.session.commit()
+
+    saved = db.session.get(TMSMatchStatus, 1)
+    assert (saved.status, saved.last_updated, saved.last_fetched) == (
+        "Called",
+        latest,
+        latest,
+    )
+
+
+def test_bulk_upsert_rowcount(app):
+    rows = [_status_row(1, "Queued", TIME)]
+    assert (
+        bulk_upsert(
+            TMSMatchStatus,
+            rows,
+            TMSMatchStatus.match_number,
+            changed_column=TMSMatchStatus.status,
+        )
+        == 1
+    )
+    assert (
+        bulk_upsert(
+            TMSMatchStatus,
+            rows,
+            TMSMatchStatus.match_number,
+            changed_column=TMSMatchStatus.status,
+        )
+        == 0
+    )
+
+
+def test_bulk_upsert_requires_update_columns(app):
+    with pytest.raises(ValueError):
+        bulk_upsert(
+            MatchStatusCode, [{"status": "Queued"}], MatchStatusCode.status
+        )
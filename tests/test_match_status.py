@@ -0,0 +1,159 @@
+"""
+Tests for saving the TMS match statuses and their transitions.
+"""
+
+# =============================================================================
+
+from datetime import datetime, timedelta
+
+from db import match_status
+from db.models import (
+    MatchStatusCode,
+    MatchStatusTransition,
+    TMSMatchStatus,
+    db,
+)
+
+# =============================================================================
+
+TIME = datetime(2026, 3, 1, 12, 0, 0)
+
+# =============================================================================
+
+
+def _transitions():
+    return [
+        (transition.match_number, transition.time_changed, status)
+        for transition, status in (
+            MatchStatusTransition.query.join(
+                MatchStatusCode,
+                MatchStatusCode.code == MatchStatusTransition.status_code,
+            )
+            .add_columns(MatchStatusCode.status)
+            .order_by(
+                MatchStatusTransition.match_number,
+                MatchStatusTransition.time_changed,
+            )
+        )
+    ]
+
+
+# =============================================================================
+
+
+def test_set_status_adds_transitions_on_change(app):
+    later = TIME + timedelta(minutes=5)
+    match_status.set_matches_tms_status({1: "Queued", 2: "Queued"}, TIME)
+    match_status.set_matches_tms_status({1: "Called", 2: "Queued"}, later)
+
+    assert _transitions() == [
+        (1, TIME, "Queued"),
+        (1, later, "Called"),
+        (2, TIME, "Queued"),
+    ]
+    assert db.session.get(TMSMatchStatus, 2).last_updated == TIME
+
+
+def test_set_status_ignores_stale_fetch(app):
+    later = TIME + timedelta(minutes=5)
+    match_status.set_matches_tms_status({1: "Called"}, later)
+    match_status.set_matches_tms_status({1: "Queued"}, TIME)
+
+    assert db.session.get(TMSMatchStatus, 1).status == "Called"
+    assert _transitions() == [(1, later, "Called")]
+
+
+def test_set_status_ignores_stale_fetch_after_unchanged_status(app):
+    # the second fetch doesn't change the status, but still makes the
+    # delayed fetch stale
+    match_status.set_matches_tms_status({1: "Called"}, TIME)
+    match_status.set_matches_tms_status(
+        {1: "Called"}, TIME + timedelta(minutes=10)
+    )
+    match_status.set_matches_tms_status(
+        {1: "Queued"}, TIME + timedelta(minutes=5)
+    )
+
+    saved = db.session.get(TMSMatchStatus, 1)
+    assert saved.status == "Called"
+    assert saved.last_updated == TIME
+    assert saved.last_fetched == TIME + timedelta(minutes=10)
+    assert _transitions() == [(1, TIME, "Called")]
+
+
+def test_set_status_same_time_is_idempotent(app):
+    match_status.set_matches_tms_status({1: "Queued"}, TIME)
+    match_status.set_matches_tms_status({1: "Queued"}, TIME)
+
+    assert _transitions() == [(1, TIME, "Queued")]
+
+
+def test_set_status_skips_missing_values(app):
+    match_status.set_matches_tms_status({1: "", 2: "Queued"}, TIME)
+
+    assert [row.match_number for row in TMSMatchStatus.query.all()] == [2]
+
+
+def test_set_status_saves_divisions(app):
+    match_status.set_matches_tms_status(
+        {1: "Queued", 2: "Queued", 3: "Queued"},
+        TIME,
+        {1: "Men's A", 2: ""},
+    )
+
+    assert [
+        (transition.match_number, transition.division)
+        for transition in MatchStatusTransition.query.order_by(
+            MatchStatusTransition.match_number
+        )
+    ] == [(1, "Men's A"), (2, None), (3, None)]
+
+
+# =============================================================================
+
+
+def test_percentile_interpolates():
+    values = [10, 20, 30, 40]
+    assert match_status._percentile(values, 0) == 10
+    assert match_status._percentile(values, 50) == 25
+    assert match_status._percentile(values, 100) == 40
+    assert match_status._percentile([7], 90) == 7
+
+
+def test_time_in_status_percentiles(app):
+    divisions = {1: "A", 2: "A", 3: "B"}
+
+    def _set(minutes, matches_info):
+        match_status.set_matches_tms_status(
+            matches_info, TIME + timedelta(minutes=minutes), divisions
+        )
+
+    _set(0, {1: "Queued", 2: "Queued", 3: "Queued"})
+    _set(10, {1: "Called", 2: "Queued", 3: "Called"})
+    _set(30, {1: "Done", 2: "Called", 3: "Called"})
+
+    time_in_status = match_status.get_time_in_status_percentiles((0, 50))
+
+    # the current status of each match is not a finished stay
+    assert time_in_status == {
+        "A": {
+            "Queued": {"count": 2, "percentiles": {0: 600, 50: 1200}},
+            "Called": {"count": 1, "percentiles": {0: 1200, 50: 1200}},
+        },
+        "B": {"Queued": {"count": 1, "percentiles": {0: 600, 50: 600}}},
+    }
+
+
+def test_time_in_status_without_sheet(app):
+    # matches that are no longer in the sheet are still counted
+    match_status.set_matches_tms_status({1: "Queued"}, TIME, {1: "A"})
+    match_status.set_matches_tms_status(
+        {2: "Queued"}, TIME + timedelta(minutes=5), {2: "B"}
+    )
+    match_status.set_matches_tms_status(
+        {1: "Called"}, TIME + timedelta(minutes=5)
+    )
+
+    assert match_status.get_time_in_status_percentiles(
+        (50,), statuses=["Queued"]
+    ) == {"A": {"Queued": {"count": 1, "percentiles": {50: 300}}}}
@@ -0,0 +1,187 @@
+"""
+Tests for setting the roster by diffing it against the current tables.
+"""
+
+# =============================================================================
+
+import copy
+
+from db import global_state, roster
+from db.models import School, Team, TeamMember, User, db
+
+# =============================================================================
+
+
+def _user(email, school, role="ATHLETE"):
+    return {
+        "email": email,
+        "first_name": email.split("@")[0].title(),
+        "last_name": "Smith",
+        "role": role,
+        "school": school,
+    }
+
+
+def _team(school, division, number, light, middle=None, alternates=()):
+    return {
+        "school": school,
+        "division": division,
+        "number": number,
+        "light": light,
+        "middle": middle,
+        "heavy": None,
+        "alternates": list(alternates),
+    }
+
+
+ROSTER = {
+    "schools": ["Princeton", "Yale"],
+    "users": [
+        _user("coach@princeton.edu", "Princeton", "COACH"),
+        _user("a@princeton.edu", "Princeton"),
+        _user("b@princeton.edu", "Princeton"),
+        _user("c@yale.edu", "Yale"),
+    ],
+    "teams": [
+        _team("Princeton", "A", 1, "a@princeton.edu", "b@princeton.edu"),
+        _team("Yale", "A", 1, "c@yale.edu"),
+    ],
+}
+
+
+def _counts(inserted=0, updated=0, deleted=0):
+    return {"inserted": inserted, "updated": updated, "deleted": deleted}
+
+
+def _members():
+    return sorted(
+        (team.school.name, team.number, user.email, member.slot)
+        for member, team, user in db.session.query(TeamMember, Team, User)
+        .join(Team, Team.id == TeamMember.team_id)
+        .join(User, User.id == TeamMember.user_id)
+    )
+
+
+# =============================================================================
+
+
+def test_set_roster_inserts_everything(app):
+    error_msg, changes = roster.set_roster(ROSTER)
+
+    assert error_msg is None
+    assert changes == {
+        "schools": _counts(inserted=2),
+        "users": _counts(inserted=4),
+        "teams": _counts(inserted=2),
+        "team_members": _counts(inserted=3),
+    }
+    assert _members() == [
+        ("Princeton", 1, "a@princeton.edu", "light"),
+        ("Princeton", 1, "b@princeton.edu", "middle"),
+        ("Yale", 1, "c@yale.edu", "light"),
+    ]
+
+
+def test_set_roster_unchanged_keeps_version(app):
+    roster.set_roster(ROSTER)
+    version = global_state.get_roster_version()
+
+    error_msg, changes = roster.set_roster(copy.deepcopy(ROSTER))
+
+    assert error_msg is None
+    assert all(counts == _counts() for counts in changes.values())
+    assert global_state.get_roster_version() == version
+
+
+def test_set_roster_applies_diff(app):
+    roster.set_roster(ROSTER)
+    version = global_state.get_roster_version()
+    ids = {user.email: user.id for user in User.query.all()}
+    princeton_id = School.query.filter_by(name="Princeton").one().id
+
+    new_roster = copy.deepcopy(ROSTER)
+    # drop Yale and its athlete and team
+    new_roster["schools"] = ["Princeton"]
+    new_roster["users"] = [
+        user for user in new_roster["users"] if user["school"] != "Yale"
+    ]
+    new_roster["users"][1]["first_name"] = "Alice"
+    new_roster["users"].append(_user("d@princeton.edu", "Princeton"))
+    # swap the slots and add an alternate
+    new_roster["teams"] = [
+        _team(
+            "Princeton",
+            "A",
+            1,
+            "b@princeton.edu",
+            "a@princeton.edu",
+            alternates=["d@princeton.edu"],
+        )
+    ]
+
+    error_msg, changes = roster.set_roster(new_roster)
+
+    assert error_msg is None
+    assert changes == {
+        "schools": _counts(deleted=1),
+        "users": _counts(inserted=1, updated=1, deleted=1),
+        "teams": _counts(updated=1, deleted=1),
+        "team_members": _counts(inserted=1, updated=2, deleted=1),
+    }
+    assert _members() == [
+        ("Princeton", 1, "a@princeton.edu", "middle"),
+        ("Princeton", 1, "b@princeton.edu", "light"),
+        ("Princeton", 1, "d@princeton.edu", "alternate"),
+    ]
+    # the unchanged rows keep their ids
+    users = {user.email: user for user in User.query.all()}
+    assert users["a@princeton.edu"].id == ids["a@princeton.edu"]
+    assert users["a@princeton.edu"].first_name == "Alice"
+    assert users["b@princeton.edu"].id == ids["b@princeton.edu"]
+    assert School.query.filter_by(name="Princeton").one().id == princeton_id
+    assert global_state.get_roster_version() > version
+
+
+def test_set_roster_invalid_rolls_back(app):
+    roster.set_roster(ROSTER)
+    members = _members()
+
+    new_roster = copy.deepcopy(ROSTER)
+    # a team member that is not an athlete
+    new_roster["teams"][0]["light"] = "coach@princeton.edu"
+
+    error_msg, changes = roster.set_roster(new_roster)
+
+    assert error_msg == "Invalid roster"
+    assert changes is None
+    assert _members() == members
+
+
+def test_clear_roster(app):
+    roster.set_roster(ROSTER)
+
+    roster.clear_roster()
+
+    assert User.query.count() == 0
+    assert School.query.count() == 0
+    assert TeamMember.query.count() == 0
+
+
+def test_iter_emails_for_division(app):
+    new_roster = copy.deepcopy(ROSTER)
+    new_roster["users"][3]["email_valid"] = False
+    new_roster["teams"].append(
+        _team("Princeton", "B", 1, "b@princeton.edu", "a@princeton.edu")
+    )
+    roster.set_roster(new_roster)
+
+    # sorted and distinct, without invalid emails
+    assert list(roster.iter_emails_for_division("A", batch_size=1)) == [
+        "a@princeton.edu",
+        "b@princeton.edu",
+    ]
+    assert list(roster.iter_emails_for_division("B")) == [
+        "a@princeton.edu",
+        "b@princeton.edu",
+    ]
+    assert list(roster.iter_emails_for_division("C")) == []
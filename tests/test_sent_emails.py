@@ -0,0 +1,257 @@
+"""
+Tests for paging through the sent emails.
+"""
+
+# =============================================================================
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from db import sent_emails
+from db._utils import bulk_insert
+from db.models import (
+    BlastEmailSent,
+    EmailRecipient,
+    EmailSent,
+    School,
+    User,
+    db,
+)
+
+# =============================================================================
+
+TIME = datetime(2026, 3, 1, 12, 0, 0)
+
+# =============================================================================
+
+
+@pytest.fixture
+def emails(app):
+    """Adds match and blast emails with some equal times sent, and
+    returns their `(blast, id)` keys in the expected page order.
+    """
+    # minutes after `TIME` for each email; equal times test the ties
+    match_minutes = [0, 1, 1, 2, 5, 5, 7]
+    blast_minutes = [1, 2, 5, 6]
+    bulk_insert(
+        EmailSent,
+        [
+            {
+                "id": email_id,
+                "match_number": 100 + email_id,
+                "template_name": "Match",
+                "subject": f"Match {email_id}",
+                "time_sent": TIME + timedelta(minutes=minutes),
+            }
+            for email_id, minutes in enumerate(match_minutes, 1)
+        ],
+    )
+    bulk_insert(
+        BlastEmailSent,
+        [
+            {
+                "id": email_id,
+                "template_name": "Blast",
+                "subject": f"Blast {email_id}",
+                "time_sent": TIME + timedelta(minutes=minutes),
+                "division": "A",
+                "tag": None,
+            }
+            for email_id, minutes in enumerate(blast_minutes, 1)
+        ],
+    )
+    bulk_insert(
+        EmailRecipient,
+        [
+            {"email_sent_id": 1, "email": "b@example.com"},
+            {"email_sent_id": 1, "email": "a@example.com"},
+        ],
+    )
+    db.session.commit()
+
+    # sorted by (time sent, blast, id), most recent first
+    keys = [
+        (minutes, 0, email_id)
+        for email_id, minutes in enumerate(match_minutes, 1)
+    ] + [
+        (minutes, 1, email_id)
+        for email_id, minutes in enumerate(blast_minutes, 1)
+    ]
+    return [
+        (bool(blast), email_id)
+        for _, blast, email_id in sorted(keys, reverse=True)
+    ]
+
+
+def _all_pages(page_size):
+    keys = []
+    cursor = None
+    while True:
+        error_msg, page = sent_emails.get_sent_emails_page(cursor, page_size)
+        assert error_msg is None
+        assert len(page["sent_emails"]) <= page_size
+        keys.extend(
+            (email["blast"], email["id"]) for email in page["sent_emails"]
+        )
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return keys
+
+
+# =============================================================================
+
+
+@pytest.mark.parametrize("page_size", [1, 2, 3, 4, 11, 50])
+def test_pages_are_in_order(emails, page_size):
+    assert _all_pages(page_size) == emails
+
+
+def test_page_format(emails):
+    error_msg, page = sent_emails.get_sent_emails_page(page_size=50)
+
+    assert error_msg is None
+    sent = {
+        (email["blast"], email["id"]): email for email in page["sent_emails"]
+    }
+    assert sent[(False, 1)]["match_number"] == 101
+    assert sent[(False, 1)]["recipients"] == [
+        "a@example.com",
+        "b@example.com",
+    ]
+    assert sent[(False, 2)]["recipients"] == []
+    assert isinstance(sent[(True, 1)]["recipients"], str)
+    assert "match_number" not in sent[(True, 1)]
+
+
+def test_empty(app):
+    assert sent_emails.get_sent_emails_page() == (
+        None,
+        {"sent_emails": [], "next_cursor": None},
+    )
+
+
+def test_invalid_cursor(emails):
+    error_msg, page = sent_emails.get_sent_emails_page("not a cursor")
+    assert error_msg is not None
+    assert page is None
+
+    error_msg, page = sent_emails.get_sent_emails_page(
+        f"{TIME.isoformat()}_2_1"
+    )
+    assert error_msg is not None
+    assert page is None
+
+
+@pytest.mark.parametrize("page_size", [0, -1])
+def test_page_size_must_be_positive(emails, page_size):
+    error_msg, page = sent_emails.get_sent_emails_page(page_size=page_size)
+    assert error_msg is not None
+    assert page is None
+
+
+def test_page_size_is_capped(app, monkeypatch):
+    monkeypatch.setattr(sent_emails, "MAX_SENT_EMAILS_PAGE_SIZE", 2)
+    bulk_insert(
+        EmailSent,
+        [
+            {
+                "match_number": match_number,
+                "template_name": "Match",
+                "subject": "Match",
+                "time_sent": TIME,
+            }
+            for match_number in range(5)
+        ],
+    )
+    db.session.commit()
+
+    error_msg, page = sent_emails.get_sent_emails_page(page_size=10**6)
+
+    assert error_msg is None
+    assert len(page["sent_emails"]) == 2
+    assert page["next_cursor"] is not None
+
+
+# =============================================================================
+
+
+@pytest.fixture
+def school_emails(app):
+    """Adds a roster of three schools and match emails sent to their
+    users.
+    """
+    school_ids = bulk_insert(
+        School,
+        [{"name": "Princeton"}, {"name": "Yale"}, {"name": "Harvard"}],
+        School.name,
+        School.id,
+    )
+    bulk_insert(
+        User,
+        [
+            {
+                "email": email,
+                "first_name": "First",
+                "last_name": "Last",
+                "role": "ATHLETE",
+                "school_id": school_ids[school],
+            }
+            for email, school in (
+                ("a@princeton.edu", "Princeton"),
+                ("b@princeton.edu", "Princeton"),
+                ("c@yale.edu", "Yale"),
+                ("d@harvard.edu", "Harvard"),
+            )
+        ],
+    )
+    bulk_insert(
+        EmailSent,
+        [
+            {
+                "id": email_id,
+                "match_number": 100 + email_id,
+                "template_name": "Match",
+                "subject": f"Match {email_id}",
+                "time_sent": TIME + timedelta(minutes=email_id),
+            }
+            for email_id in range(1, 4)
+        ],
+    )
+    bulk_insert(
+        EmailRecipient,
+        [
+            {"email_sent_id": email_sent_id, "email": email}
+            for email_sent_id, email in (
+                (1, "a@princeton.edu"),
+                (1, "b@princeton.edu"),
+                (1, "c@yale.edu"),
+                (2, "a@princeton.edu"),
+                (3, "b@princeton.edu"),
+                # no longer in the roster
+                (3, "old@yale.edu"),
+            )
+        ],
+    )
+    db.session.commit()
+
+
+def test_get_emails_sent_to(school_emails):
+    sent = sent_emails.get_emails_sent_to("a@princeton.edu")
+
+    # most recent first
+    assert [email["match_number"] for email in sent] == [102, 101]
+    assert sent[0]["subject"] == "Match 2"
+    assert sent_emails.get_emails_sent_to("d@harvard.edu") == []
+
+
+def test_count_emails_sent_by_school(school_emails):
+    # an email sent to multiple users of a school counts once
+    assert sent_emails.count_emails_sent_by_school() == {
+        "Princeton": 3,
+        "Yale": 1,
+    }
+    assert sent_emails.count_emails_sent_by_school(["Yale", "Harvard"]) == {
+        "Yale": 1
+    }
+    assert sent_emails.count_emails_sent_by_school([]) == {}
@@ -0,0 +1,64 @@
+"""
+Tests for the background poller of the TMS match statuses.
+"""
+
+# =============================================================================
+
+import pytest
+
+from utils import fetch_tms, tms_poller
+
+# =============================================================================
+
+
+@pytest.fixture
+def poller(app, monkeypatch):
+    """A poller for the app (without its thread) that is used by
+    `get_poll_info()`.
+    """
+    poller = tms_poller.TMSStatusPoller(app, 60)
+    monkeypatch.setattr(tms_poller, "_POLLER", poller)
+    yield poller
+    # release the Postgres advisory lock for the next poller (closing the
+    # connection would only return it to the pool, still holding the lock)
+    if poller._lock_connection is not None:
+        poller._lock_connection.invalidate()
+
+
+def test_no_poll_yet(poller):
+    assert tms_poller.get_poll_info() == {
+        "interval": 60,
+        "last_poll_time": None,
+        "last_poll_duration": None,
+        "last_error": None,
+    }
+
+
+def test_poll_info_is_saved(poller, monkeypatch):
+    monkeypatch.setattr(
+        fetch_tms, "fetch_matches_tms_status", lambda: "Sheet not found"
+    )
+    poller.poll()
+
+    poll_info = tms_poller.get_poll_info()
+    assert poll_info["last_poll_time"] is not None
+    assert poll_info["last_poll_duration"] >= 0
+    assert poll_info["last_error"] == "Sheet not found"
+
+    monkeypatch.setattr(fetch_tms, "fetch_matches_tms_status", lambda: None)
+    poller.poll()
+
+    assert tms_poller.get_poll_info()["last_error"] is None
+
+
+def test_poll_error_is_saved(poller, monkeypatch):
+    def fetch():
+        raise RuntimeError("connection reset")
+
+    monkeypatch.setattr(fetch_tms, "fetch_matches_tms_status", fetch)
+    poller.poll()
+
+    assert (
+        tms_poller.get_poll_info()["last_error"]
+        == "RuntimeError: connection reset"
+    )